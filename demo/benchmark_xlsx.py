@@ -0,0 +1,87 @@
+"""
+Compares XLSX writers: rows per second and peak memory of the export.
+
+    python demo/benchmark_xlsx.py [rows]
+
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from export_util import Exporter
+from export_util import template as tpl
+from export_util.normalize import Normalizer
+from export_util.writer import XLSXBytesOutputWriter, XLSXStreamOutputWriter
+
+
+TEMPLATE = tpl.Object(
+    col=1,
+    titles=True,
+    fields=[
+        tpl.Field(1, 'ID', 'id'),
+        tpl.Field(2, 'Title', 'title'),
+        tpl.Field(3, 'Artist', 'artist'),
+        tpl.Field(4, 'Duration', 'duration'),
+        tpl.Field(5, 'Price', 'price'),
+        tpl.Field(6, 'Released', 'released'),
+        tpl.Field(7, 'ISRC', 'isrc'),
+        tpl.Field(8, 'Explicit', 'explicit'),
+    ]
+)
+
+WRITERS = [
+    ('openpyxl', lambda: XLSXBytesOutputWriter()),
+    ('openpyxl write-only', lambda: XLSXBytesOutputWriter(write_only=True)),
+    ('stream', lambda: XLSXStreamOutputWriter()),
+    ('stream inline', lambda: XLSXStreamOutputWriter(shared_strings=False)),
+]
+
+
+def get_data(count):
+    for i in range(count):
+        yield {
+            'id': i,
+            'title': 'Track #{}'.format(i),
+            'artist': 'Artist & Band #{}'.format(i % 100),
+            'duration': 180 + i % 120,
+            'price': 0.99 + i % 3,
+            'released': datetime.date(2000 + i % 20, 1 + i % 12, 1),
+            'isrc': 'ES-A01-{:05d}'.format(i % 100000),
+            'explicit': i % 2 == 0,
+        }
+
+
+def export(create_writer, data, path):
+    exporter = Exporter(normalizer=Normalizer(TEMPLATE), output=create_writer())
+    exporter.generate_to(data, path)
+
+
+def benchmark(name, create_writer, count):
+    data = list(get_data(count))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.xlsx')
+
+        started = time.perf_counter()
+        export(create_writer, data, path)
+        spent = time.perf_counter() - started
+
+        # Memory is traced by the separate run, as tracing slows it down.
+        tracemalloc.start()
+        export(create_writer, data, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print('{:<20} {:>10.0f} rows/s {:>10.1f} MB peak {:>10.1f} MB file'.format(
+            name, count / spent, peak / 2 ** 20, os.path.getsize(path) / 2 ** 20
+        ))
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print('{} rows'.format(rows))
+    for writer_name, writer_factory in WRITERS:
+        benchmark(writer_name, writer_factory, rows)
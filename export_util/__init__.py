@@ -1,5 +1,9 @@
+import asyncio
+import os
 from datetime import datetime
 
+from export_util.utility import StreamOutput
+
 
 class Exporter:
     """
@@ -41,6 +45,9 @@ class Exporter:
         ex.generate()
 
     """
+    # Number of rows written by `agenerate()` before passing control to the event loop.
+    rows_per_await = 500
+
     def __init__(self, normalizer, output):
         """
         :param export_util.normalize.Normalizer normalizer:
@@ -69,6 +76,71 @@ class Exporter:
             self._get_content_data(data),
         )
 
+    async def agenerate(self, data, filename=None):
+        """
+        Async version of `generate()`. Data could be the async iterable, and
+        template formatters could be async functions. Control is passed to
+        the event loop while rows are written, and the output document is
+        built in the executor.
+
+        :param data:
+        :param filename:
+        :return tuple:
+        """
+        return (
+            self._get_file_name(filename),
+            self._get_content_mime_type(),
+            await self._aget_content_data(data),
+        )
+
+    def generate_to(self, data, fileobj_or_path):
+        """
+        Writes file content into the file at the path, or into the binary
+        file-like object: a file, a pipe or a socket. Content is written as
+        rows are rendered and is not kept in memory.
+
+        :param data:
+        :param fileobj_or_path:
+        :return:
+        """
+        if isinstance(fileobj_or_path, (str, os.PathLike)):
+            with open(fileobj_or_path, 'wb') as fileobj:
+                return self.generate_to(data, fileobj)
+
+        self.output.set_output(fileobj_or_path)
+        self._write_content(data)
+        self.output.finish()
+
+    def stream(self, data, chunk_size=64 * 1024):
+        """
+        Generates file content by chunks of about `chunk_size` bytes, which
+        could be passed to the streaming response. Use `generate()` with
+        the same arguments to get the file name and mime type.
+
+        CSV and bytes are passed as rows are written. XLSX and PDF documents
+        are built at the end, and passed by chunks while they are written,
+        XLSX archive is written with data descriptors.
+
+        :param data:
+        :param int chunk_size:
+        :return generator:
+        """
+        output = StreamOutput()
+        self.output.set_output(output)
+        self._set_titles()
+
+        sparse = getattr(self.normal, 'sparse', False)
+        for row in self._get_content(data):
+            if sparse:
+                self.output.write_sparse(row)
+            else:
+                self.output.write(*row)
+
+            if output.size >= chunk_size:
+                yield output.take()
+
+        yield from output.drain(self.output.finish, chunk_size)
+
     def _get_file_name(self, filename=None):
         """
         :param filename:
@@ -89,17 +161,59 @@ class Exporter:
         :param data:
         :return bytes:
         """
-        for cols in self._get_content(data):
-            self.output.write(*cols)
+        self._write_content(data)
         return self.output.get_data()
 
+    def _write_content(self, data):
+        """
+        :param data:
+        :return:
+        """
+        self._set_titles()
+        if getattr(self.normal, 'sparse', False):
+            for row in self._get_content(data):
+                self.output.write_sparse(row)
+        elif hasattr(self.output, 'write_rows'):
+            self.output.write_rows(self._get_content(data))
+        else:
+            for cols in self._get_content(data):
+                self.output.write(*cols)
+
+    async def _aget_content_data(self, data):
+        """
+        :param data:
+        :return bytes:
+        """
+        self._set_titles()
+        sparse = getattr(self.normal, 'sparse', False)
+        count = 0
+        async for row in self.normal.abuild_table(data):
+            if sparse:
+                self.output.write_sparse(row)
+            else:
+                self.output.write(*row)
+
+            count += 1
+            if count % self.rows_per_await == 0:
+                await asyncio.sleep(0)
+
+        return await asyncio.get_running_loop().run_in_executor(None, self.output.get_data)
+
+    def _set_titles(self):
+        """
+        Passes root titles of the table to the output.
+        :return:
+        """
+        set_titles = getattr(self.output, 'set_titles', None)
+        if set_titles is not None and hasattr(self.normal, 'get_titles'):
+            set_titles(self.normal.get_titles())
+
     def _get_content(self, data):
         """
         :param data:
-        :return generator:
+        :return iterator:
         """
-        for row in self.normal.build_table(data):
-            yield row
+        return iter(self.normal.build_table(data))
 
 
 __all__ = ['Exporter']
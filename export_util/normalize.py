@@ -1,4 +1,8 @@
+import asyncio
 import collections
+import collections.abc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 import schematics
 
@@ -239,19 +243,104 @@ class Normalizer:
     *Preformat* argument is a function which takes two arguments. First - os the this column value, and the Second
     is the whole object `DataGetter`. So you can compute any difficult values which are depends on other object values.
 
+    Pass `codegen=True` to render fields rows by python functions generated for the template. It renders exactly the
+    same rows, but faster for the big exports.
+
+    Pass `sparse=True` to render `export_lib.template.SparseRow` rows, which are keeping only set cells. Writers handle
+    them with `write_sparse()`.
+
+    I/O-bound formatters (see `export_util.value.io_bound`) are rendered by `io_workers` threads, for the next
+    `io_window` objects of the table.
+
     """
-    def __init__(self, template: tpl.Object, *args, **kwargs):
+    def __init__(self, template: tpl.Object, *args, codegen=False, sparse=False, io_workers=8, io_window=64, **kwargs):
         """
         Create normalizer instance.
         """
         self.template = template
+        self.codegen = codegen
+        self.sparse = sparse
+        self.io_workers = io_workers
+        self.io_window = io_window
+        self.template.compile(codegen, sparse)
 
     def build_table(self, obj):
         """
         Returns N rows which are representing this object due to provided.
-        template.
+        template. Rows of the flat template are rendered by the tight loop.
+        """
+        plan = self.template.compile(self.codegen, self.sparse)
+        if plan.flat:
+            return plan.render_flat(obj)
+        return self._render(plan, obj)
+
+    def _render(self, plan, obj):
+        """
+        Renders rows of the object in the new render context.
+        """
+        with self.get_context() as context:
+            yield from plan.render(obj, context)
+
+    def get_context(self):
+        """
+        Returns new render context of the table.
+        """
+        return tpl.RenderContext(io_workers=self.io_workers, io_window=self.io_window)
+
+    def get_titles(self):
+        """
+        Returns root titles rows of the table.
+        """
+        plan = self.template.compile(self.codegen, self.sparse)
+        return [plan.titles[:]] if plan.render_titles else []
+
+    async def abuild_table(self, obj):
+        """
+        Async version of `build_table()`. Data could be the async iterable of root objects, then root `path`
+        and `preformat` are applied to each of them. Async and I/O-bound formatters of the next root objects
+        are resolved concurrently, while the rows of the current one are rendered.
+        """
+        plan = self.template.compile(self.codegen, self.sparse)
+        titles = plan.render_titles
+
+        with self.get_context() as context:
+            async for objects, prefetched in self._aprefetch(plan, obj, context.io_window):
+                context.prefetched = prefetched
+                for row in plan.render_objects(objects, context, titles):
+                    yield row
+                titles = titles and (plan.each_title or not objects)
+
+    async def _aprefetch(self, plan, obj, window):
+        """
+        Yields root objects lists and their prefetched values in the original order. Values of the next
+        `window` lists are resolved in the background.
+        """
+        pending = collections.deque()
+        try:
+            async for objects in self._aiter_objects(plan, obj):
+                pending.append((objects, asyncio.ensure_future(plan.prefetch(objects))))
+                if len(pending) >= window:
+                    objects, task = pending.popleft()
+                    yield objects, await task
+
+            while pending:
+                objects, task = pending.popleft()
+                yield objects, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def _aiter_objects(plan, obj):
         """
-        yield from self.template.render(obj)
+        Yields root objects lists, which are rendered one by one.
+        """
+        if isinstance(obj, collections.abc.AsyncIterable):
+            async for item in obj:
+                yield plan.get_objects(item)
+        else:
+            for item in plan.get_objects(obj):
+                yield [item]
 
 
 class SchematicsNormalizer(Normalizer):
@@ -270,12 +359,12 @@ class SchematicsNormalizer(Normalizer):
         fold_nested=True,
     )
 
-    def __init__(self, model: schematics.Model, *args, **kwargs):
+    def __init__(self, model: schematics.Model, *args, codegen=False, sparse=False, **kwargs):
         """
         Create objects template from schematics model.
         """
         template = self._build_template(model, **kwargs)
-        super(SchematicsNormalizer, self).__init__(template, *args, **kwargs)
+        super(SchematicsNormalizer, self).__init__(template, *args, codegen=codegen, sparse=sparse, **kwargs)
 
     def _build_template(self, model: schematics.Model, **kwargs) -> tpl.Object:
         """
@@ -399,7 +488,7 @@ class SchematicsNormalizer(Normalizer):
                 preformatters = self._get_model_preformat_field(model, field_name)
                 if not preformatters:
                     preformatters = [getter]
-                elif isinstance(preformatters, collections.Iterable):
+                elif isinstance(preformatters, collections.abc.Iterable):
                     preformatters = [getter] + list(preformatters)
                 elif callable(preformatters):
                     preformatters = [getter, preformatters]
@@ -418,7 +507,7 @@ class SchematicsNormalizer(Normalizer):
                 return source_formatters
 
             callable_formatters = []
-            if isinstance(source_formatters, collections.Iterable):
+            if isinstance(source_formatters, collections.abc.Iterable):
                 for formatter in source_formatters:
                     if isinstance(formatter, str):
                         callable_formatters.append(getattr(model, formatter))
@@ -443,7 +532,154 @@ class SchematicsNormalizer(Normalizer):
         return '.'.join([parent or '', field_name]).strip('.')
 
 
+# Render plan of the parallel normalizer worker process.
+_worker_plan = None
+
+
+def _init_worker(template, codegen, sparse):
+    """
+    Compiles the template once per worker process.
+    """
+    global _worker_plan
+    _worker_plan = template.compile(codegen, sparse)
+
+
+def _object_templates(template: tpl.Object):
+    """
+    Returns list of the template and all nested objects templates. The order is the same
+    in each process, so the list index identifies the template between processes.
+    """
+    templates = [template]
+    for item in template.sorted_nested:
+        templates.extend(_object_templates(item))
+    return templates
+
+
+class _SpeculativeContext(tpl.RenderContext):
+    """
+    Render context of the not first chunk. It does not know which top offsets are rendered by the
+    previous chunks, so it renders none and records the templates which are asking for them.
+    """
+    def __init__(self):
+        super(_SpeculativeContext, self).__init__()
+        self.requested = set()
+
+    def take_offset_top(self, template):
+        self.requested.add(template)
+        return False
+
+
+def _render_chunk(objects, first):
+    """
+    Renders chunk of the root objects in the worker process.
+    :param list objects:
+    :param bool first: Is this chunk the first one.
+    :return tuple: Rows and indexes of templates which rendered (or asked to render) top offset.
+    """
+    plan = _worker_plan
+    if first:
+        with tpl.RenderContext() as context:
+            rows = list(plan.render_objects(objects, context))
+        taken = context.offset_top
+    else:
+        with _SpeculativeContext() as context:
+            rows = list(plan.render_objects(objects, context, plan.render_titles and plan.each_title))
+        taken = context.requested
+
+    templates = _object_templates(plan.template)
+    return rows, {templates.index(template) for template in taken}
+
+
+class ParallelNormalizer(Normalizer):
+    """
+    Normalizer which renders root objects list in the worker processes.
+
+    Root objects are split into chunks of `chunk_size` objects, and each chunk is rendered by the
+    process pool. Rows are yielded in the original order and are the same as `Normalizer` renders:
+    root titles are rendered before the first chunk only, and the top offset of each object is rendered
+    once. When a chunk happens to be the first one which renders some top offset, it's rendered
+    again in the current process.
+
+    Template is passed to the workers once. Processes are forked where it's possible, otherwise
+    the template (and so its preformat functions) should be picklable. Root objects and rendered
+    cells values are always pickled.
+
+        ex = Exporter(
+            normalizer=normalize.ParallelNormalizer(template, workers=4, chunk_size=5000),
+            output=writer.CSVBytesOutputWriter()
+        )
+
+    """
+    def __init__(self, template: tpl.Object, *args, workers=None, chunk_size=1000, **kwargs):
+        """
+        :param template:
+        :param int workers: Number of worker processes, number of CPUs if None.
+        :param int chunk_size: Number of root objects rendered by the worker at once.
+        """
+        super(ParallelNormalizer, self).__init__(template, *args, **kwargs)
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def build_table(self, obj):
+        """
+        Returns N rows which are representing this object due to provided.
+        template.
+        """
+        plan = self.template.compile(self.codegen, self.sparse)
+        objects = plan.get_objects(obj)
+        if len(objects) <= self.chunk_size:
+            with self.get_context() as context:
+                yield from plan.render_objects(objects, context)
+            return
+
+        context = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+
+        templates = _object_templates(self.template)
+        workers = self.workers or multiprocessing.cpu_count()
+
+        # Indexes of templates which rendered the top offset.
+        rendered = set()
+        pending = collections.deque()
+
+        with ProcessPoolExecutor(workers, context, _init_worker, (self.template, self.codegen, self.sparse)) as executor:
+            for start in range(0, len(objects), self.chunk_size):
+                chunk = objects[start:start + self.chunk_size]
+                pending.append((chunk, executor.submit(_render_chunk, chunk, not start), not start))
+
+                # Keep the limited number of rendered chunks in memory.
+                if len(pending) > workers * 2:
+                    yield from self._get_chunk_rows(plan, templates, rendered, *pending.popleft())
+
+            while pending:
+                yield from self._get_chunk_rows(plan, templates, rendered, *pending.popleft())
+
+    def _get_chunk_rows(self, plan, templates, rendered, chunk, future, first):
+        """
+        Returns rows of the rendered chunk, and renders it again if the chunk
+        should render some top offset.
+        :param tpl.RenderPlan plan:
+        :param list templates:
+        :param set rendered:
+        :param list chunk:
+        :param future:
+        :param bool first:
+        :return list:
+        """
+        rows, taken = future.result()
+        if first or taken <= rendered:
+            rendered.update(taken)
+            return rows
+
+        with tpl.RenderContext((templates[i] for i in rendered), self.io_workers, self.io_window) as context:
+            rows = list(plan.render_objects(chunk, context, plan.render_titles and plan.each_title))
+        rendered.update(templates.index(template) for template in context.offset_top)
+        return rows
+
+
 __all__ = [
     'Normalizer',
     'SchematicsNormalizer',
+    'ParallelNormalizer',
 ]
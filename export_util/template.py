@@ -1,8 +1,117 @@
+import asyncio
 import collections
+import collections.abc
+import functools
+import inspect
+import itertools
+import linecache
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 from export_util.utility import cached_property
 
 
+# Marker of the missing key or attribute. It's used instead of exceptions
+# while walking through the value path.
+_MISSING = object()
+
+# Values of these types never have nested items, so the path walking stops
+# on them without raising and catching `TypeError`.
+_SCALAR_TYPES = (str, bytes, int, float, list, tuple, type(None))
+
+
+def _identity(value):
+    """
+    Default preformat of the `Object`. Module level function, so templates
+    could be pickled.
+    """
+    return value
+
+
+class PathAccessor:
+    """
+    Path accessor is the compiled dotted value path. Path is split once and
+    accessors are cached by the path string, so `DataGetter` does not need to
+    parse the path on each call.
+
+    Example:
+
+        >> accessor = PathAccessor.compile('a.b.c')
+        >> print(accessor.get({'a': {'b': {'c': 'hello'}}}))
+        hello
+
+    When some key or attribute is missing, walking continues from the default
+    value, the same way `DataGetter` always did.
+    """
+    __slots__ = ('path', 'keys')
+
+    def __init__(self, path):
+        """
+        :param str path:
+        """
+        self.path = path
+        self.keys = tuple(path.split('.'))
+
+    def __repr__(self):
+        return 'PathAccessor("{}")'.format(self.path)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def compile(path):
+        """
+        Returns cached accessor of the path.
+        :param str path:
+        :return PathAccessor:
+        """
+        return PathAccessor(path)
+
+    def get(self, source, default=None):
+        """
+        Get item value if the source is a dict, otherwise get attribute value.
+        :param source:
+        :param default:
+        :return:
+        """
+        if isinstance(source, dict):
+            return self.get_item(source, default)
+        return self.get_attribute(source, default)
+
+    def get_item(self, value, default=None):
+        """
+        Get item value
+        :param value:
+        :param default:
+        :return:
+        """
+        for key in self.keys:
+            if type(value) is dict:
+                value = value.get(key, _MISSING)
+            elif isinstance(value, _SCALAR_TYPES):
+                value = _MISSING
+            else:
+                try:
+                    value = value[key]
+                except Exception:
+                    value = _MISSING
+
+            if value is _MISSING:
+                value = default
+        return value
+
+    def get_attribute(self, value, default=None):
+        """
+        Get attribute value
+        :param value:
+        :param default:
+        :return:
+        """
+        for key in self.keys:
+            value = getattr(value, key, _MISSING)
+            if value is _MISSING:
+                value = default
+        return value
+
+
 class DataGetter:
     """
     Data getter allows to get value of an nested attribute or item of a dictionary object.
@@ -37,76 +146,135 @@ class DataGetter:
         """
         if not path:
             return default
-        
-        if isinstance(self.source, dict):
-            return self._get_items(path, default)
-        return self._get_attributes(path, default)
 
-    def _get_attributes(self, path, default=None):
+        return PathAccessor.compile(path).get(self.source, default)
+
+
+class SparseRow:
+    """
+    Sparse row keeps only the cells which are set. Cells are stored as the
+    `{column index: value}` dict in ascending order of columns, any other
+    cell of the row is an empty string. Wide templates with nested tables
+    produce rows which are mostly empty, so writers handle only set cells.
+
+    Example:
+
+        >> row = SparseRow(4, {1: 'Hello', 3: 'World'})
+        >> print(row.to_list())
+        ['', 'Hello', '', 'World']
+    """
+    __slots__ = ('width', 'cells')
+
+    def __init__(self, width, cells=None):
         """
-        Get attribute value
-        :param path:
-        :param default:
-        :return:
+        :param int width:
+        :param dict cells:
         """
-        if '.' not in path:
-            return getattr(self.source, path, default)
+        self.width = width
+        self.cells = {} if cells is None else cells
 
-        path, nested = path.split('.', 1)
-        value = getattr(self.source, path)
-        while '.' in nested:
-            path, nested = nested.split('.', 1)
-            value = getattr(value, path, default)
+    def __len__(self):
+        return self.width
 
-        if nested:
-            value = getattr(value, nested, default)
+    def __iter__(self):
+        return iter(self.to_list())
 
-        return value
+    def __eq__(self, other):
+        if isinstance(other, SparseRow):
+            return self.to_list() == other.to_list()
+        if isinstance(other, (list, tuple)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return 'SparseRow({}, {})'.format(self.width, self.cells)
 
-    def _get_items(self, path, default=None):
+    def items(self):
         """
-        Get item value
-        :param path:
-        :param default:
+        Returns `(column index, value)` pairs of set cells.
         :return:
         """
-        if '.' not in path:
-            try:
-                return self.source[path]
-            except KeyError:
-                return default
-
-        path, nested = path.split('.', 1)
-        try:
-            value = self.source[path]
-        except KeyError:
-            value = default
-
-        while '.' in nested:
-            path, nested = nested.split('.', 1)
-            try:
-                value = value[path]
-            except Exception:
-                value = default
+        return self.cells.items()
 
-        if nested:
-            try:
-                value = value[nested]
-            except Exception:
-                value = default
+    def to_list(self):
+        """
+        Returns dense row.
+        :return list:
+        """
+        row = [''] * self.width
+        for i, value in self.cells.items():
+            row[i] = value
+        return row
 
-        return value
+    def padded(self, add):
+        """
+        Returns the row extended by `add` empty cells.
+        :param int add:
+        :return SparseRow:
+        """
+        return SparseRow(self.width + add, self.cells)
+
+    def overlaps(self, other):
+        """
+        Checks if the rows are overlaps in some cells.
+        :param SparseRow other:
+        :return bool:
+        """
+        cells = other.cells
+        for i, value in self.cells.items():
+            if value and cells.get(i):
+                return True
+        return False
+
+    def merge(self, other):
+        """
+        Merges two not overlapped rows, see `NestedSet`.
+        :param SparseRow other:
+        :return SparseRow:
+        """
+        width = min(self.width, other.width)
+        first, second = self.cells, other.cells
+
+        cells = {}
+        for i in sorted(first.keys() | second.keys()):
+            if i >= width:
+                break
+            cells[i] = first.get(i, '') or second.get(i, '')
+        return SparseRow(width, cells)
 
 
 class NestedSet:
     """
     NestedSet is the utility which allows to fold rows depending on
     cells overlapping.
+
+    Each row is added into the first row after the last one it overlaps
+    with. Filled cells of every row are kept as the integer bitmask, and the
+    last row which fills each column is indexed, so placing the row does not
+    scan the rows already added.
+
+    `offset` is the number of leading empty cells which all added rows have
+    in common. Rows are sized without them.
+
+    Rows could be lists or `SparseRow` instances, but not mixed.
     """
-    def __init__(self):
+    def __init__(self, offset=0):
+        self._offset = offset
         self._length = 0
         self._nested = []
 
+        # Filled cells bitmask of each row.
+        self._masks = []
+
+        # Rows are padded to the widest row lazily. `_padding` is the number
+        # of cells added to the width so far, and `_bases` keeps its value at
+        # the moment each row was padded last time.
+        self._padding = 0
+        self._bases = []
+
+        # Index of the last row which fills each column.
+        self._last = {}
+
     def add(self, row):
         """
         Adds new row
@@ -114,32 +282,111 @@ class NestedSet:
         :return:
         """
         self._check_size(row)
-
-        if not self._nested or self._is_overlaps(self._nested[-1], row):
-            return self._append(row)
-
-        for i, ln in enumerate(reversed(self._nested)):
-            if self._is_overlaps(ln, row):
-                merge_index = (i or 1)*-1
-                break
-        else:
-            merge_index = 0
-        self._nested[merge_index] = self._merge(self._nested[merge_index], row)
+        mask = self._get_mask(row)
+
+        # Find the last row which overlaps with the new one.
+        last = self._last
+        overlapped = -1
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            index = last.get(bit, -1)
+            if index > overlapped:
+                overlapped = index
+
+        target = overlapped + 1
+        if target == len(self._nested):
+            return self._append(row, mask)
+        self._merge_into(target, row, mask)
 
     def get_rows(self):
         """
         Returns folded rows.
         :return list:
         """
+        for i in range(len(self._nested)):
+            self._get_row(i)
         return self._nested
 
-    def _append(self, row):
+    def _append(self, row, mask):
         """
         Appends row into rows list.
         :param row:
+        :param int mask:
         :return:
         """
+        index = len(self._nested)
         self._nested.append(row)
+        self._masks.append(mask)
+        self._bases.append(self._padding)
+
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            self._last[bit] = index
+
+    def _merge_into(self, index, row, mask):
+        """
+        Merges row into the row at `index`. Merged row is as long as the
+        shortest of them.
+        :param int index:
+        :param row:
+        :param int mask:
+        :return:
+        """
+        merged = self._merge(self._get_row(index), row)
+        self._nested[index] = merged
+
+        previous = self._masks[index]
+        merged_mask = (previous | mask) & ((1 << len(merged)) - 1)
+        self._masks[index] = merged_mask
+
+        bits = merged_mask & ~previous
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            self._last[bit] = index
+
+        # Columns cut off by the shorter row are not filled by this row
+        # anymore.
+        bits = previous & ~merged_mask
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            if self._last.get(bit) == index:
+                self._reindex(bit, index)
+
+    def _reindex(self, bit, index):
+        """
+        Finds the last row before `index` which fills the column.
+        :param int bit:
+        :param int index:
+        :return:
+        """
+        for i in range(index - 1, -1, -1):
+            if self._masks[i] & bit:
+                self._last[bit] = i
+                return
+        del self._last[bit]
+
+    def _get_row(self, index):
+        """
+        Returns row at `index` padded to the current width.
+        :param int index:
+        :return:
+        """
+        row = self._nested[index]
+        add = self._padding - self._bases[index]
+        if add:
+            if isinstance(row, SparseRow):
+                row = row.padded(add)
+            else:
+                row = row + ([''] * add)
+            self._nested[index] = row
+            self._bases[index] = self._padding
+        return row
 
     def _check_size(self, row):
         """
@@ -148,23 +395,26 @@ class NestedSet:
         :param row:
         :return:
         """
+        length = len(row) - self._offset
         if not self._length:
-            self._length = len(row)
-        elif len(row) > self._length:
-            new_length = len(row)
-            add = new_length - self._length
-            self._length = new_length
-            for i, r in enumerate(self._nested):
-                self._nested[i] = r + ([''] * add)
+            self._length = length
+        elif length > self._length:
+            self._padding += length - self._length
+            self._length = length
 
-    def _is_overlaps(self, first, second):
+    @staticmethod
+    def _get_mask(row):
         """
-        Checks if the rows are overlaps in some cells.
-        :param first:
-        :param second:
-        :return:
+        Returns bitmask of the filled row cells.
+        :param row:
+        :return int:
         """
-        return any(x and y for x, y in zip(first, second))
+        mask = 0
+        cells = row.items() if isinstance(row, SparseRow) else enumerate(row)
+        for i, value in cells:
+            if value:
+                mask |= 1 << i
+        return mask
 
     def _merge(self, first, second):
         """
@@ -173,6 +423,8 @@ class NestedSet:
         :param second:
         :return:
         """
+        if isinstance(first, SparseRow):
+            return first.merge(second)
         return [x or y for x, y in zip(first, second)]
 
 
@@ -199,6 +451,10 @@ class Field:
 
         self.length = 1
 
+        # Object template which owns this field. It's used to drop the
+        # compiled render plan when the field is changed.
+        self._parent = None
+
         self.trans = DataGetter({})
         self.set_translator(translate)
 
@@ -217,7 +473,7 @@ class Field:
         if self.format is None:
             return value
 
-        if isinstance(self.format, collections.Iterable):
+        if isinstance(self.format, collections.abc.Iterable):
             for formatter in self.format:
                 value = formatter(value, dg)
             return value
@@ -248,7 +504,16 @@ class Field:
             raise TypeError(f'Expected DataGetter got: {type(translator).__name__}')
 
         self.trans = translator or DataGetter({})
-        
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drops compiled render plan of the object which owns this field.
+        :return:
+        """
+        if self._parent is not None:
+            self._parent.invalidate()
+
     def render(self, dg: DataGetter):
         """
         :param DataGetter dg: 
@@ -293,23 +558,26 @@ class Object:
         self.column = col
         self.value_path = path
         self.fields = fields or []
-        self.format = preformat if callable(preformat) else lambda a: a
+        self.format = preformat if callable(preformat) else _identity
         self.is_object = True
 
         self._verbose_name = verbose_name
 
+        # Compiled render plans, see `compile()`.
+        self._plans = {}
+        self._parent = None
+        for field in self.fields:
+            field._parent = self
+
         self.offset_top = 0
-        self._rendered_offset_top = False
         if 'offset_top' in options:
             self.offset_top = int(options.pop('offset_top'))
 
         self.offset_item = 0
-        self._rendered_offset_item = False
         if 'offset_item' in options:
             self.offset_item = int(options.pop('offset_item'))
         
         self.render_titles = False
-        self._rendered_titles = False
         if 'titles' in options:
             self.render_titles = bool(options.pop('titles'))
 
@@ -335,6 +603,13 @@ class Object:
     def __repr__(self):
         return str(self)
 
+    def __getstate__(self):
+        # Compiled plans hold generated functions, they are built again
+        # after unpickling.
+        state = self.__dict__.copy()
+        state['_plans'] = {}
+        return state
+
     def add_field(self, field: Field):
         """
         Adds field.
@@ -345,7 +620,32 @@ class Object:
         field.set_translator(self.trans)
 
         # Add child field
+        field._parent = self
         self.fields.append(field)
+        self.invalidate()
+
+    def compile(self, codegen=False, sparse=False):
+        """
+        Returns render plan of this object. Plan is built once and reused
+        until the template is changed with `add_field()` or `set_translator()`.
+        :param bool codegen: Generate python code of the fields row renderers.
+        :param bool sparse: Render `SparseRow` rows instead of lists.
+        :return RenderPlan:
+        """
+        plan = self._plans.get((codegen, sparse))
+        if plan is None:
+            plan = self._plans[codegen, sparse] = RenderPlan(self, codegen=codegen, sparse=sparse)
+        return plan
+
+    def invalidate(self):
+        """
+        Drops compiled render plans of this object and all of its parents.
+        Call it after changing template attributes directly.
+        :return:
+        """
+        self._plans = {}
+        if self._parent is not None:
+            self._parent.invalidate()
 
     @property
     def length(self):
@@ -403,123 +703,653 @@ class Object:
 
         # Pass translator to all nested fields.
         self._pass_translator()
+        self.invalidate()
 
-    def render(self, data):
+    def render(self, data, codegen=False, sparse=False, context=None):
         """
         Renders objects or an single object.
+
+        Template keeps no state of the rendering, so the same template could
+        render data in many threads at once.
         :param data:
+        :param bool codegen:
+        :param bool sparse:
+        :param RenderContext context: State of the rendering, new one if omitted.
         :return:
         """
+        return self.compile(codegen, sparse).render(data, context)
+
+    def _pass_translator(self):
+        """
+        Provides translator to all nested fields.
+        :return:
+        """
+        for field in self.fields:
+            field.set_translator(self.trans)
+
+
+class RenderContext:
+    """
+    State of the single rendering. Templates and their plans are shared
+    between renderings, so everything which changes while the table
+    is rendered is kept here.
+    """
+    def __init__(self, offset_top=(), io_workers=8, io_window=64):
+        """
+        :param offset_top: Objects templates which have rendered their top offset already.
+        :param int io_workers: Number of threads rendering I/O-bound cells.
+        :param int io_window: Number of objects which I/O-bound cells are rendered ahead.
+        """
+        self.offset_top = set(offset_top)
+        self.io_workers = io_workers
+        self.io_window = io_window
+        self._io_executor = None
+
+        # Result of `RenderPlan.prefetch()` for the objects which are rendered now.
+        self.prefetched = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_io_executor(self):
+        """
+        Returns thread pool of I/O-bound formatters. It's started on the
+        first use, so templates without them do not start any threads.
+        :return ThreadPoolExecutor:
+        """
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(self.io_workers, thread_name_prefix='export_util-io')
+        return self._io_executor
+
+    def close(self):
+        """
+        Stops I/O-bound formatters threads.
+        :return:
+        """
+        if self._io_executor is not None:
+            self._io_executor.shutdown(cancel_futures=True)
+            self._io_executor = None
+
+    def take_offset_top(self, template):
+        """
+        Returns True only the first time it's called for the template, as
+        the top offset is rendered once per table.
+        :param Object template:
+        :return bool:
+        """
+        if template in self.offset_top:
+            return False
+        self.offset_top.add(template)
+        return True
+
+
+class IOPrefetch:
+    """
+    Sync counterpart of `RenderPlan.prefetch()`. Walks objects of the plan
+    and all nested plans lazily, in the rendering order, and renders the
+    I/O-bound cells of the next `io_window` objects of the whole tree by
+    the context thread pool, while the current row is rendered.
+
+    Iterators of `prefetched` are consumed by the plans the same way as
+    the result of `prefetch()` is.
+    """
+    def __init__(self, plan, objects, context):
+        """
+        :param RenderPlan plan: Root plan of the rendering.
+        :param list objects: Root objects.
+        :param RenderContext context:
+        """
+        self.executor = context.get_io_executor()
+        self.window = context.io_window
+
+        # Objects lists and cells futures of each plan, which are not taken yet.
+        self.queues = {}
+        self.prefetched = {}
+        plans = [plan]
+        while plans:
+            current = plans.pop()
+            plans.extend(current.nested)
+            self.queues[current] = (collections.deque(), collections.deque())
+            self.prefetched[current] = (self._iter_lists(current), self._iter_values(current))
+
+        # Number of the objects which cells are submitted, but not taken yet.
+        self.pending = 0
+        self._walk = self._walk_objects(plan, objects)
+
+    def _walk_objects(self, plan, objects):
+        """
+        Queues objects lists and submits the cells, one object per step.
+        :param RenderPlan plan:
+        :param list objects:
+        :return:
+        """
+        lists, values = self.queues[plan]
+        lists.append(objects)
+        yield
+        for obj in objects:
+            if plan.io_cells:
+                values.append([self.executor.submit(plan._render_io_cell, obj, cell) for cell in plan.io_cells])
+                self.pending += 1
+                yield
+
+            for child in plan.nested:
+                yield from self._walk_objects(child, child.get_objects(obj))
+
+    def _advance(self):
+        """
+        Makes the next step of the walk.
+        :return bool: False if all objects are walked.
+        """
+        for _ in self._walk:
+            return True
+        return False
+
+    def _iter_lists(self, plan):
+        """
+        Yields objects lists of the plan.
+        :param RenderPlan plan:
+        :return:
+        """
+        lists = self.queues[plan][0]
+        while lists or self._advance():
+            if lists:
+                yield lists.popleft()
+
+    def _iter_values(self, plan):
+        """
+        Yields I/O-bound cells values of each object of the plan.
+        :param RenderPlan plan:
+        :return:
+        """
+        values = self.queues[plan][1]
+        while True:
+            while (not values or self.pending < self.window) and self._advance():
+                pass
+            if not values:
+                return
+            futures = values.popleft()
+            self.pending -= 1
+            yield [future.result() for future in futures]
+
+
+class RenderPlan:
+    """
+    Frozen render plan of the `Object` template. Plan resolves fields order,
+    columns, inline flags, offsets and the titles row once, so rendering of
+    each object does not need to sort and filter template fields again.
+
+    Plan is built by `Object.compile()` and dropped by `Object.invalidate()`.
+
+    Plan of the root object holds plans of all nested objects, and each of
+    them knows absolute columns of its cells. So every row is rendered into
+    the single list of the final width, without adding margins of the parent
+    objects level by level.
+
+    With `codegen` enabled, fields row of the object is rendered by the python
+    function generated for this plan. Function has value paths, defaults and
+    formatters inlined, and renders exactly the same rows.
+
+    With `sparse` enabled, plan renders `SparseRow` rows instead of lists.
+
+    Plan of the flat object, which has fields only and no offsets, renders
+    rows by `render_flat()` without the nesting machinery.
+    """
+    def __init__(self, template: Object, codegen=False, sparse=False, base=0):
+        """
+        :param template:
+        :param bool codegen:
+        :param bool sparse:
+        :param int base: Left margin of the parent object rows.
+        """
+        self.template = template
+        self.codegen = codegen
+        self.sparse = sparse
+        self.accessor = PathAccessor.compile(template.value_path) if template.value_path else None
+        self.format = template.format
+
+        # Left margin of the rows of this object.
+        self.base = base
+        self.offset = base + (template.column - 1 if template.column > 1 else 0)
+
+        self.offset_top = template.offset_top
+        self.offset_item = template.offset_item
+        self.render_titles = template.render_titles
+        self.each_title = template.each_title
+        self.fold_nested = template.fold_nested
+
+        self.nested = tuple(RenderPlan(child, codegen, sparse, self.offset) for child in template.sorted_nested)
+
+        # Resolve absolute row positions of inline fields. Fields with the
+        # same column are placed one after another, as they are sorted.
+        positions = []
+        for item in template.sorted_items:
+            if not item.inline:
+                continue
+            position = positions[-1][0] + 1 if positions else self.offset
+            positions.append((max(position, self.offset + item.column - 1), item))
+
+        self.width = positions[-1][0] + 1 if positions else self.offset
+
+        # Titles row and the row of constant values, which are the same for
+        # each rendered object: titles of nested objects and fields without
+        # value path.
+        self.titles = [''] * self.width
+        self.blank = [''] * self.width
+        self.cells = []
+        self.layout = []
+
+        # Cells with I/O-bound or async formatters are rendered ahead of the
+        # rows: by the context thread pool, see `IOPrefetch`, or by the
+        # event loop, see `prefetch()`.
+        self.io_cells = []
+        for position, item in positions:
+            self.titles[position] = item.verbose_name
+            if item.is_object or not item.value_path:
+                self.blank[position] = item.verbose_name
+                self.layout.append((position, item.verbose_name, None))
+                continue
+
+            cell = (
+                position,
+                PathAccessor.compile(item.value_path),
+                item.default,
+                self._get_formatters(item),
+            )
+            if any(self._is_io_bound(formatter) for formatter in cell[3]):
+                self.io_cells.append(cell)
+            else:
+                self.cells.append(cell)
+                self.layout.append((position, None, cell))
+        self.cells = tuple(self.cells)
+        self.layout = tuple(self.layout)
+        self.io_cells = tuple(self.io_cells)
+        self.title_cells = {position: item.verbose_name for position, item in positions}
+
+        # Data getter is passed to formatters only.
+        self.use_getter = any(cell[3] for cell in self.cells)
+
+        if codegen:
+            self.render_fields = self._generate_render_fields()
+        elif sparse:
+            self.render_fields = self._render_sparse_fields
+        else:
+            self.render_fields = self._render_fields
+
+        # Whether this plan or any nested one has I/O-bound cells.
+        self.io_bound = bool(self.io_cells) or any(child.io_bound for child in self.nested)
+
+        self.flat = not (
+            self.nested or self.io_cells or sparse or self.offset_top > 0 or self.offset_item > 0
+            or (self.render_titles and self.each_title)
+        )
+
+    def render(self, data, context=None):
+        """
+        Renders objects or an single object.
+        :param data:
+        :param RenderContext context:
+        :return:
+        """
+        if context is not None and context.prefetched is not None:
+            objects = next(context.prefetched[self][0])
+        else:
+            objects = self.get_objects(data)
+        return self.render_objects(objects, context)
+
+    def get_objects(self, data):
+        """
+        Returns list of objects to render from the data.
+        :param data:
+        :return list:
+        """
         # Get object data
-        obj = self._get_object_value(data)
+        objects = self._get_object_value(data)
 
         # Make it iterable if needed
-        if not isinstance(obj, list):
-            obj = [obj]
+        if not isinstance(objects, list):
+            objects = [objects]
+        return objects
+
+    def render_flat(self, data):
+        """
+        Renders rows of the flat plan: the titles row and fields rows of the
+        objects, same as `render()` does.
+        :param data:
+        :return iterator:
+        """
+        objects = self.get_objects(data)
+        rows = map(self.render_fields, objects)
+        if self.render_titles and objects:
+            return itertools.chain((self.titles[:],), rows)
+        return rows
+
+    def render_objects(self, objects, context=None, titles=None):
+        """
+        Renders list of objects returned by `get_objects()`.
+        :param list objects:
+        :param RenderContext context:
+        :param bool titles: Render titles before the first object, `render_titles` of the template if None.
+        :return:
+        """
+        if context is None:
+            with RenderContext() as context:
+                yield from self.render_objects(objects, context, titles)
+            return
+
+        if self.io_bound and context.prefetched is None:
+            # Window of I/O-bound cells spans objects of the nested plans too.
+            context.prefetched = IOPrefetch(self, objects, context).prefetched
+            try:
+                yield from self.render_objects(objects, context, titles)
+            finally:
+                context.prefetched = None
+            return
+
+        if titles is None:
+            titles = self.render_titles
+
+        if self.io_cells:
+            io_values = context.prefetched[self][1]
 
         # Render each object
-        self._rendered_titles = False
-        for o in obj:
-            for row in self._render(o):
-                yield row
+        for obj in objects:
+            # Render offset top
+            if self.offset_top > 0 and context.take_offset_top(self.template):
+                for _ in range(self.offset_top):
+                    yield self._empty_row(self.base + 1)
+
+            # Render header if needs
+            if titles:
+                titles = self.each_title
+                yield SparseRow(self.width, dict(self.title_cells)) if self.sparse else self.titles[:]
+
+            # Render row
+            if self.io_cells:
+                yield self._set_io_values(self.render_fields(obj), next(io_values))
+            else:
+                yield self.render_fields(obj)
+
+            # Render nested table
+            if self.nested:
+                yield from self._render_nested(obj, context)
+
             if self.offset_item > 0:
-                yield self._set_offset_row([''])
+                yield self._empty_row(self.offset + 1)
 
-    def _pass_translator(self):
+    @staticmethod
+    def _render_io_cell(obj, cell):
         """
-        Provides translator to all nested fields.
+        Returns value of the I/O-bound cell.
+        :param obj:
+        :param tuple cell:
         :return:
         """
-        for field in self.fields:
-            field.set_translator(self.trans)
-    
-    def _render(self, obj):
+        _, accessor, default, formatters = cell
+        value = accessor.get(obj, default)
+        object_data_getter = DataGetter(obj)
+        for formatter in formatters:
+            value = formatter(value, object_data_getter)
+            if inspect.isawaitable(value):
+                if inspect.iscoroutine(value):
+                    value.close()
+                raise TypeError('Async formatter {!r} could be rendered by `Exporter.agenerate()` only'.format(formatter))
+        return value
+
+    async def prefetch(self, objects):
         """
-        :param dict obj:
-        :return: 
+        Resolves the objects lists of this and all nested objects, and
+        the values of their I/O-bound and async cells, concurrently. Set the
+        result as `RenderContext.prefetched` to render the objects rows.
+        :param list objects:
+        :return dict:
         """
-        # Render offset top
-        if self.offset_top > 0 and not self._rendered_offset_top:
-            self._rendered_offset_top = True
-            yield from [['']]*self.offset_top
-        
-        # Render header if needs
-        if self.render_titles and not self._rendered_titles:
-            self._rendered_titles = not self.each_title
-            yield self._set_offset_row(self._render_titles())
-            
-        # Render row
-        yield self._set_offset_row(self._render_fields(obj))
-        
-        # Create nested folder
-        ns = NestedSet()
+        prefetched = {}
+        cells = []
+        self._collect_prefetch(objects, prefetched, cells)
 
-        # Render nested table
-        for child in self.sorted_nested:
-            for row in child.render(obj):
-                if self.fold_nested is True:
-                    ns.add(row)
-                else:
-                    yield self._set_offset_row(row)
+        results = await asyncio.gather(*(self._arender_io_cell(obj, cell) for _, _, obj, cell in cells))
+        for (values, i, _, _), value in zip(cells, results):
+            values[i] = value
 
-        # Throw nested rows if exists
-        if self.fold_nested is True:
-            for row in ns.get_rows():
-                yield self._set_offset_row(row)
+        return {plan: (iter(lists), iter(values)) for plan, (lists, values) in prefetched.items()}
 
-    def _set_offset_row(self, row):
+    def _collect_prefetch(self, objects, prefetched, cells):
+        """
+        Walks objects in the rendering order and collects the cells to
+        resolve.
+        :param list objects:
+        :param dict prefetched: Objects lists and cells values lists of each plan.
+        :param list cells:
+        :return:
+        """
+        lists, values = prefetched.setdefault(self, ([], []))
+        lists.append(objects)
+        for obj in objects:
+            if self.io_cells:
+                object_values = [None] * len(self.io_cells)
+                values.append(object_values)
+                cells.extend((object_values, i, obj, cell) for i, cell in enumerate(self.io_cells))
+
+            for child in self.nested:
+                child._collect_prefetch(child.get_objects(obj), prefetched, cells)
+
+    @staticmethod
+    async def _arender_io_cell(obj, cell):
         """
-        Adds left margin to any row depending on `self.column` value.
+        Returns value of the I/O-bound cell. Async formatters are awaited,
+        sync I/O-bound ones are called in the thread.
+        :param obj:
+        :param tuple cell:
+        :return:
+        """
+        _, accessor, default, formatters = cell
+        value = accessor.get(obj, default)
+        object_data_getter = DataGetter(obj)
+        for formatter in formatters:
+            if getattr(formatter, 'io_bound', False):
+                value = await asyncio.to_thread(formatter, value, object_data_getter)
+            else:
+                value = formatter(value, object_data_getter)
+            if inspect.isawaitable(value):
+                value = await value
+        return value
+
+    @staticmethod
+    def _is_io_bound(formatter):
+        """
+        Checks if formatter is marked with `value.io_bound` or is async.
+        :param formatter:
+        :return bool:
+        """
+        return getattr(formatter, 'io_bound', False) or inspect.iscoroutinefunction(formatter)
+
+    def _set_io_values(self, row, values):
+        """
+        Puts I/O-bound cells values into the fields row.
         :param row:
+        :param list values:
         :return:
         """
-        if self.column <= 1:
-            return row
-        return (['']*(self.column-1)) + row
-        
+        if isinstance(row, SparseRow):
+            cells = row.cells
+            cells.update((cell[0], value) for cell, value in zip(self.io_cells, values))
+            return SparseRow(row.width, dict(sorted(cells.items())))
+
+        for cell, value in zip(self.io_cells, values):
+            row[cell[0]] = value
+        return row
+
+    def _empty_row(self, width):
+        """
+        Returns row of empty cells.
+        :param int width:
+        :return:
+        """
+        if self.sparse:
+            return SparseRow(width)
+        return [''] * width
+
+    def _render_nested(self, obj, context):
+        """
+        Renders nested objects tables of the object.
+        :param obj:
+        :param RenderContext context:
+        :return:
+        """
+        if not self.fold_nested:
+            for child in self.nested:
+                yield from child.render(obj, context)
+            return
+
+        # Fold nested rows
+        ns = NestedSet(self.offset)
+        for child in self.nested:
+            for row in child.render(obj, context):
+                ns.add(row)
+
+        yield from ns.get_rows()
+
     def _get_object_value(self, data):
         """
         Returns object using value_path and data formatter.
         :param data:
         :return:
         """
-        return self.format(DataGetter(data).get(self.value_path, data))
+        if self.accessor is None:
+            return self.format(data)
+        return self.format(self.accessor.get(data, data))
 
     def _render_fields(self, obj):
         """
-        Returns current object fields list.
-        :param: dict obj:
+        Returns object fields row.
+        :param obj:
         :return list:
         """
-        object_data_getter = DataGetter(obj)
-        result = []
-        for field in self.sorted_items:
-            if not field.inline:
+        row = self.blank[:]
+        if self.cells:
+            object_data_getter = DataGetter(obj) if self.use_getter else None
+            for position, accessor, default, formatters in self.cells:
+                value = accessor.get(obj, default)
+                for formatter in formatters:
+                    value = formatter(value, object_data_getter)
+                row[position] = value
+        return row
+
+    def _render_sparse_fields(self, obj):
+        """
+        Returns object fields row as the sparse row.
+        :param obj:
+        :return SparseRow:
+        """
+        cells = {}
+        object_data_getter = DataGetter(obj) if self.use_getter else None
+        for position, constant, cell in self.layout:
+            if cell is None:
+                cells[position] = constant
                 continue
 
-            if field.column - 1 > len(result):
-                result += [''] * (field.column - len(result) - 1)
+            _, accessor, default, formatters = cell
+            value = accessor.get(obj, default)
+            for formatter in formatters:
+                value = formatter(value, object_data_getter)
+            cells[position] = value
+        return SparseRow(self.width, cells)
 
-            if field.is_object is True:
-                result.append(field.verbose_name)
-            else:
-                result.append(field.render(object_data_getter))
-        return result
+    @staticmethod
+    def _get_formatters(field: Field):
+        """
+        Returns tuple of field formatters, see `Field.__call__`.
+        :param field:
+        :return tuple:
+        """
+        if field.format is None:
+            return ()
+        if isinstance(field.format, collections.abc.Iterable):
+            return tuple(field.format)
+        if callable(field.format):
+            return field.format,
 
-    def _render_titles(self):
+        # Let the field raise its error on render
+        return field,
+
+    def _generate_render_fields(self):
         """
-        Returns current object fields titles.
-        :param: dict obj:
-        :return list:
+        Generates fields row renderer function of this plan.
+        :return callable:
         """
-        result = []
-        for field in self.sorted_items:
-            if not field.inline:
-                continue
+        namespace = {'DataGetter': DataGetter, 'SparseRow': SparseRow, 'MISSING': _MISSING}
+        lines = ['def render_fields(obj):']
+        if self.use_getter:
+            lines.append('    dg = DataGetter(obj)')
+        if self.cells:
+            lines.append('    plain = type(obj) is dict')
+
+        values = [repr(c) if c == '' else None for c in self.blank]
+        for position, cell in enumerate(self.blank):
+            if values[position] is None:
+                namespace['c%d' % position] = cell
+                values[position] = 'c%d' % position
+
+        for i, (position, accessor, default, formatters) in enumerate(self.cells):
+            namespace['a%d' % i] = accessor
+            namespace['d%d' % i] = default
+            v = 'v%d' % i
+
+            # Dict items are looked up inline, anything else goes through
+            # the path accessor.
+            lines.append('    if plain:')
+            lines.extend(self._generate_items_lookup(namespace, i, accessor.keys, 'obj', 2))
+            lines.append('    else:')
+            lines.append('        {v} = a{i}.get(obj, d{i})'.format(v=v, i=i))
+
+            for j, formatter in enumerate(formatters):
+                namespace['f%d_%d' % (i, j)] = formatter
+                lines.append('    {v} = f{i}_{j}({v}, dg)'.format(v=v, i=i, j=j))
+            values[position] = v
+
+        if self.sparse:
+            cells = ', '.join('{}: {}'.format(position, values[position]) for position, _, _ in self.layout)
+            lines.append('    return SparseRow({}, {{{}}})'.format(self.width, cells))
+        else:
+            lines.append('    return [{}]'.format(', '.join(values)))
 
-            if field.column - 1 > len(result):
-                result += [''] * (field.column - len(result) - 1)
+        source = '\n'.join(lines) + '\n'
+        filename = '<export_util render_fields {} {}>'.format(self.template.verbose_name or 'ROOT', id(self))
+        exec(compile(source, filename, 'exec'), namespace)
 
-            result.append(field.verbose_name)
+        # Keep source available for tracebacks, while the plan is alive.
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        weakref.finalize(self, linecache.cache.pop, filename, None)
+        return namespace['render_fields']
+
+    @staticmethod
+    def _generate_items_lookup(namespace, i, keys, source, depth):
+        """
+        Generates inline lookup of dict items, see `PathAccessor.get_item`.
+        :param dict namespace:
+        :param int i: Cell number.
+        :param tuple keys:
+        :param str source: Variable name of the source dict.
+        :param int depth: Indentation level.
+        :return list:
+        """
+        v = 'v%d' % i
+        indent = '    ' * depth
+        lines = ['{}{} = {}.get({!r}, MISSING)'.format(indent, v, source, keys[0])]
+        if len(keys) == 1:
+            lines.append('{}if {v} is MISSING: {v} = d{i}'.format(indent, v=v, i=i))
+            return lines
+
+        # Walk the rest of the path by the accessor, when the value is
+        # missing or is not a dict.
+        rest = 'r%d_%d' % (i, depth)
+        namespace[rest] = PathAccessor.compile('.'.join(keys[1:]))
+        lines.append('{}if type({v}) is dict:'.format(indent, v=v))
+        lines.extend(RenderPlan._generate_items_lookup(namespace, i, keys[1:], v, depth + 1))
+        lines.append('{}else:'.format(indent))
+        lines.append('{}    {v} = {r}.get_item(d{i} if {v} is MISSING else {v}, d{i})'.format(indent, v=v, r=rest, i=i))
+        return lines
 
-        return result
@@ -1,11 +1,744 @@
+import asyncio
+import base64
+import collections
+import csv
+import datetime
+import decimal
+import gc
+import io
+import linecache
 import os
+import random
+import re
+import tempfile
+import threading
+import time
 import unittest
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+from reportlab.lib.pagesizes import A4, landscape, letter
+
+from export_util import Exporter, normalize, utility, value, writer, template as tpl
+
+# Images of the XLSX templates are read by Pillow, which is optional.
+try:
+    import PIL.Image
+except ImportError:
+    PIL = None
 
 
 class TestExport(unittest.TestCase):
     def test_test(self):
          self.assertEqual("l", "l") 
 
+    def test_minimal_writer(self):
+        class Writer:
+            mime_type = 'text/plain'
+            extension = 'txt'
+
+            def __init__(self):
+                self.rows = []
+
+            def write(self, *cols):
+                self.rows.append(cols)
+
+            def get_data(self):
+                return self.rows
+
+        template = tpl.Object(titles=True, fields=[tpl.Field(1, 'A', 'a')])
+        rows = Exporter(normalize.Normalizer(template), Writer()).generate([{'a': 1}])[2]
+        self.assertEqual(rows, [('A',), (1,)])
+
+
+class TestRenderPlan(unittest.TestCase):
+    def create_template(self):
+        return tpl.Object(col=1, titles=True, fields=[
+            tpl.Field(2, 'Title', 'title'),
+            tpl.Field(1, 'ID', 'id'),
+            tpl.Object(col=3, verbose_name='Authors', path='authors', inline=True, fields=[
+                tpl.Field(1, 'Name', 'name'),
+            ]),
+        ])
+
+    def test_plan_is_reused(self):
+        template = self.create_template()
+        self.assertIs(template.compile(), template.compile())
+
+    def test_plan_rows(self):
+        template = self.create_template()
+        rows = list(template.render([{'id': 1, 'title': 'A', 'authors': [{'name': 'X'}]}]))
+        self.assertEqual(rows, [
+            ['ID', 'Title', 'Authors'],
+            [1, 'A', 'Authors'],
+            ['', '', 'X'],
+        ])
+
+    def test_add_field_invalidates_plan(self):
+        template = self.create_template()
+        plan = template.compile()
+        template.add_field(tpl.Field(4, 'Year', 'year'))
+        self.assertIsNot(plan, template.compile())
+        self.assertEqual(next(template.render([{}])), ['ID', 'Title', 'Authors', 'Year'])
+
+    def test_nested_change_invalidates_parent_plan(self):
+        template = self.create_template()
+        plan = template.compile()
+        template.fields[2].set_translator({'Name': 'Nombre'})
+        self.assertIsNot(plan, template.compile())
+
+        rows = list(template.render([{'authors': [{}]}]))
+        self.assertEqual(rows[2], ['', '', '---'])
+        template.set_translator({'Title': 'Titel'})
+        self.assertEqual(next(template.render([{}])), ['ID', 'Titel', 'Authors'])
+
+    def test_nested_rows_absolute_columns(self):
+        template = tpl.Object(col=2, fields=[
+            tpl.Field(1, 'ID', 'id'),
+            tpl.Object(col=2, verbose_name='Cues', path='cues', fold_nested=True, offset_item=1, fields=[
+                tpl.Field(1, 'Title', 'title'),
+                tpl.Object(col=2, verbose_name='Authors', path='authors', fields=[tpl.Field(1, 'Name', 'name')]),
+                tpl.Object(col=3, verbose_name='Publishers', path='publishers', fields=[tpl.Field(1, 'Name', 'name')]),
+            ]),
+        ])
+        data = {'id': 1, 'cues': [{'title': 'A', 'authors': [{'name': 'X'}], 'publishers': [{'name': 'Y'}]}]}
+        self.assertEqual(list(template.render(data)), [
+            ['', 1],
+            ['', '', 'A'],
+            ['', '', '', 'X', 'Y'],
+            ['', '', ''],
+        ])
+
+    def test_flat_plan(self):
+        self.assertFalse(self.create_template().compile().flat)
+
+        template = tpl.Object(col=2, titles=True, fields=[tpl.Field(1, 'ID', 'id'), tpl.Field(3, 'Name', 'name', default='')])
+        data = [{'id': 1, 'name': 'A'}, {'id': 2}]
+        for codegen in (False, True):
+            plan = template.compile(codegen)
+            self.assertTrue(plan.flat)
+            self.assertEqual(list(plan.render_flat(data)), [['', 'ID', '', 'Name'], ['', 1, '', 'A'], ['', 2, '', '']])
+            self.assertEqual(list(plan.render_flat(data)), list(plan.render(data)))
+            self.assertEqual(list(plan.render_flat([])), [])
+
+    def test_render_keeps_no_state(self):
+        template = tpl.Object(titles=True, fields=[
+            tpl.Field(1, 'ID', 'id'),
+            tpl.Object(col=2, verbose_name='Authors', path='authors', offset_top=1, fields=[tpl.Field(1, 'Name', 'name')]),
+        ])
+        data = [{'id': 1, 'authors': [{'name': 'X'}]}, {'id': 2, 'authors': [{'name': 'Y'}]}]
+        expected = [['ID'], [1], [''], ['', 'X'], [2], ['', 'Y']]
+        self.assertEqual(list(template.render(data)), expected)
+        self.assertEqual(list(template.render(data)), expected)
+
+    def test_render_in_threads(self):
+        template = self.create_template()
+        data = [{'id': i, 'title': str(i), 'authors': [{'name': 'X'}] * 3} for i in range(200)]
+        expected = list(template.render(data))
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda _: list(template.render(data)), range(8)))
+        self.assertEqual(results, [expected] * 8)
+
+
+class TestPathAccessor(unittest.TestCase):
+    def test_accessor_is_cached(self):
+        self.assertIs(tpl.PathAccessor.compile('a.b'), tpl.PathAccessor.compile('a.b'))
+        self.assertEqual(tpl.PathAccessor.compile('a.b').keys, ('a', 'b'))
+
+    def test_get_item(self):
+        accessor = tpl.PathAccessor.compile('a.b.c')
+        self.assertEqual(accessor.get({'a': {'b': {'c': 1}}}), 1)
+        self.assertEqual(accessor.get({'a': {'b': None}}, '---'), '---')
+        self.assertEqual(accessor.get({'a': 'str'}, '---'), '---')
+        self.assertEqual(accessor.get({}, '---'), '---')
+
+    def test_get_attribute(self):
+        class Source:
+            a = type('A', (), {'b': 2})
+
+        self.assertEqual(tpl.PathAccessor.compile('a.b').get(Source), 2)
+        self.assertEqual(tpl.PathAccessor.compile('x.b').get(Source, '---'), '---')
+
+
+class TestNestedSet(unittest.TestCase):
+    @staticmethod
+    def fold(rows):
+        """
+        Reference folding, which scans rows on every add.
+        """
+        nested, length = [], 0
+        for row in rows:
+            if not length:
+                length = len(row)
+            elif len(row) > length:
+                nested = [x + [''] * (len(row) - length) for x in nested]
+                length = len(row)
+            overlapped = [i for i, x in enumerate(nested) if any(a and b for a, b in zip(x, row))]
+            target = overlapped[-1] + 1 if overlapped else 0
+            if target == len(nested):
+                nested.append(row)
+            else:
+                nested[target] = [x or y for x, y in zip(nested[target], row)]
+        return nested
+
+    def test_readme_example(self):
+        ns = tpl.NestedSet()
+        ns.add(['', 'Hello', 'World'])
+        ns.add(['This is', '', ''])
+        self.assertEqual(ns.get_rows(), [['This is', 'Hello', 'World']])
+        ns.add(['hi', '', ''])
+        ns.add(['foo', '', 'bar'])
+        self.assertEqual(ns.get_rows(), [['This is', 'Hello', 'World'], ['hi', '', ''], ['foo', '', 'bar']])
+
+    def test_fold_same_rows(self):
+        for seed in range(300):
+            rnd = random.Random(seed)
+            width = rnd.randint(1, 8)
+            rows = [
+                [rnd.choice(['', '', 'x', 0, 'y']) for _ in range(width + rnd.randint(0, 3))]
+                for _ in range(rnd.randint(1, 12))
+            ]
+            ns = tpl.NestedSet()
+            for row in rows:
+                ns.add(row)
+            self.assertEqual(ns.get_rows(), self.fold(rows), 'seed {}'.format(seed))
+
+
+class RandomTemplates:
+    """
+    Builds random templates and data to compare rendering modes.
+    """
+    paths = ['a', 'b', 'a.b', 'a.b.c', 'x.y', 'items']
+    defaults = ['---', 0, None, [], {'b': 'DB'}]
+
+    @staticmethod
+    def upper(value, dg):
+        return str(value).upper()
+
+    @staticmethod
+    def peek(value, dg):
+        return '{}|{}'.format(value, dg.get('a.b', 'none'))
+
+    def create_template(self, rnd, depth=0):
+        fields = []
+        for _ in range(rnd.randint(1, 4)):
+            options = {'default': rnd.choice(self.defaults)}
+            if rnd.random() < 0.3:
+                options['preformat'] = rnd.choice([self.upper, self.peek, [self.peek, self.upper]])
+            fields.append(tpl.Field(rnd.randint(1, 5), 'F', rnd.choice(self.paths + [None]), **options))
+
+        if depth < 2:
+            for _ in range(rnd.randint(0, 2)):
+                fields.append(self.create_template(rnd, depth + 1))
+
+        return tpl.Object(
+            col=rnd.randint(1, 3),
+            fields=fields,
+            verbose_name='N' if depth else None,
+            path=rnd.choice(['items', 'a.items', None]) if depth else None,
+            titles=rnd.random() < 0.5,
+            fold_nested=rnd.random() < 0.5,
+            inline=rnd.random() < 0.5,
+            offset_item=rnd.randint(0, 1),
+        )
+
+    def create_data(self, rnd, depth=0):
+        data = {k: rnd.choice(['s', 0, '', None, True]) for k in ('b', 'x') if rnd.random() < 0.7}
+        if rnd.random() < 0.7:
+            data['a'] = rnd.choice([{'b': {'c': 'abc'}}, {'b': 'ab'}, 'a', {}])
+        if depth < 2 and rnd.random() < 0.7:
+            data['items'] = [self.create_data(rnd, depth + 1) for _ in range(rnd.randint(0, 3))]
+        if rnd.random() < 0.2:
+            data = collections.OrderedDict(data)
+        return data
+
+    def create_cases(self, count=200):
+        for seed in range(count):
+            rnd = random.Random(seed)
+            template_seed = rnd.random()
+            data = [self.create_data(rnd) for _ in range(rnd.randint(0, 4))]
+            yield seed, (lambda s=template_seed: self.create_template(random.Random(s))), data
+
+
+class TestCodegen(RandomTemplates, unittest.TestCase):
+    """
+    Generated fields renderers must render the same rows as the plan.
+    """
+    def test_codegen_renders_same_rows(self):
+        for seed, create_template, data in self.create_cases():
+            expected = list(create_template().render(data))
+            rows = list(create_template().render(data, codegen=True))
+            self.assertEqual(rows, expected, 'seed {}'.format(seed))
+
+    def test_codegen_source_is_released(self):
+        def sources():
+            return [name for name in linecache.cache if name.startswith('<export_util render_fields')]
+
+        gc.collect()
+        before = len(sources())
+        for _ in range(50):
+            tpl.Object(fields=[tpl.Field(1, 'A', 'a')]).compile(codegen=True)
+        gc.collect()
+        self.assertEqual(len(sources()), before)
+
+    def test_codegen_attribute_source(self):
+        class Source:
+            a = {'b': 'item'}
+            b = 'attr'
+
+        template = tpl.Object(fields=[
+            tpl.Field(1, 'A', 'a.b'),
+            tpl.Field(2, 'B', 'b', preformat=self.upper),
+            tpl.Field(3, 'C', 'c.d'),
+        ])
+        self.assertEqual(list(template.render([Source], codegen=True)), list(template.render([Source])))
+
+
+class TestSparseRow(RandomTemplates, unittest.TestCase):
+    def test_sparse_renders_same_rows(self):
+        for seed, create_template, data in self.create_cases():
+            expected = list(create_template().render(data))
+            for codegen in (False, True):
+                rows = list(create_template().render(data, codegen=codegen, sparse=True))
+                self.assertTrue(all(isinstance(row, tpl.SparseRow) for row in rows))
+                self.assertEqual([row.to_list() for row in rows], expected, 'seed {}'.format(seed))
+
+    def test_nested_set_folds_sparse_rows(self):
+        ns = tpl.NestedSet()
+        ns.add(tpl.SparseRow(3, {1: 'Hello', 2: 'World'}))
+        ns.add(tpl.SparseRow(3, {0: 'This is'}))
+        ns.add(tpl.SparseRow(3, {0: 'hi'}))
+        self.assertEqual([row.to_list() for row in ns.get_rows()], [['This is', 'Hello', 'World'], ['hi', '', '']])
+
+    def test_writer_sparse_output(self):
+        template = tpl.Object(col=2, titles=True, fields=[tpl.Field(1, 'A', 'a'), tpl.Field(4, 'B', 'b')])
+        data = [{'a': 1, 'b': 'x'}, {'a': 0}]
+
+        outputs = []
+        for sparse in (False, True):
+            exporter = Exporter(normalize.Normalizer(template, sparse=sparse), writer.CSVBytesOutputWriter())
+            outputs.append(exporter.generate(data)[2])
+        self.assertEqual(outputs[0], outputs[1])
+
+
+class TestIOBound(RandomTemplates, unittest.TestCase):
+    def create_io_template(self, formatter):
+        return tpl.Object(titles=True, fields=[
+            tpl.Field(1, 'ID', 'id'),
+            tpl.Field(2, 'Name', 'id', preformat=formatter),
+            tpl.Object(col=3, path='items', fields=[tpl.Field(1, 'Sub', 'id', preformat=[formatter, self.upper])]),
+        ])
+
+    def test_io_bound_renders_same_rows(self):
+        threads = set()
+
+        def name(value, dg):
+            threads.add(threading.current_thread().name)
+            return 'name-{}-{}'.format(value, dg.get('id'))
+
+        data = [{'id': i, 'items': [{'id': i * 10 + j} for j in range(i % 3)]} for i in range(100)]
+        expected = list(self.create_io_template(name).render(data))
+        threads.clear()
+
+        template = self.create_io_template(value.io_bound(name))
+        for codegen in (False, True):
+            self.assertEqual(list(template.render(data, codegen=codegen)), expected)
+            rows = list(template.render(data, codegen=codegen, sparse=True))
+            self.assertEqual([row.to_list() for row in rows], expected)
+        self.assertTrue(all(thread.startswith('export_util-io') for thread in threads))
+
+    def test_io_window_spans_nested_objects(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def name(value, dg):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return 'name-{}'.format(value)
+
+        # Each nested objects list has one object only.
+        template = tpl.Object(fields=[
+            tpl.Field(1, 'ID', 'id'),
+            tpl.Object(col=2, path='items', fields=[tpl.Field(1, 'Sub', 'id', preformat=value.io_bound(name))]),
+        ])
+        data = [{'id': i, 'items': [{'id': i}]} for i in range(40)]
+
+        normalizer = normalize.Normalizer(template, io_workers=4)
+        rows = [list(row) for row in normalizer.build_table(data)]
+        self.assertEqual(rows, [row for i in range(40) for row in ([i, None], ['', 'name-{}'.format(i)])])
+        self.assertEqual(running[1], 4)
+
+
+class TestAsyncExport(RandomTemplates, unittest.TestCase):
+    @staticmethod
+    async def collect(rows):
+        return [row async for row in rows]
+
+    def test_async_renders_same_rows(self):
+        for seed, create_template, data in self.create_cases(100):
+            expected = list(normalize.Normalizer(create_template()).build_table(data))
+            rows = asyncio.run(self.collect(normalize.Normalizer(create_template()).abuild_table(data)))
+            self.assertEqual(rows, expected, 'seed {}'.format(seed))
+
+    def test_async_formatters(self):
+        async def name(value, dg):
+            await asyncio.sleep(0)
+            return 'name-{}'.format(value)
+
+        async def source():
+            for i in range(50):
+                yield {'id': i, 'items': [{'id': i * 10 + j} for j in range(i % 3)]}
+
+        template = tpl.Object(titles=True, fields=[
+            tpl.Field(1, 'ID', 'id'),
+            tpl.Field(2, 'Name', 'id', preformat=[name, self.upper]),
+            tpl.Object(col=3, path='items', offset_top=1, fields=[tpl.Field(1, 'Sub', 'id', preformat=name)]),
+        ])
+        exporter = Exporter(normalize.Normalizer(template), writer.CSVBytesOutputWriter())
+        content = asyncio.run(exporter.agenerate(source()))[2]
+
+        lines = content.decode().splitlines()
+        self.assertEqual(lines[:3], ['ID;Name;', '0;NAME-0;', '1;NAME-1;'])
+        self.assertEqual(lines[3:5], ['""', ';;name-10'])
+        with self.assertRaises(TypeError):
+            list(template.render([{'id': 1}]))
+
+
+class TestStream(unittest.TestCase):
+    def create_exporter(self, output):
+        template = tpl.Object(titles=True, fields=[tpl.Field(1, 'A', 'a'), tpl.Field(2, 'B', 'b')])
+        return Exporter(normalize.Normalizer(template), output)
+
+    def test_stream_csv(self):
+        data = [{'a': i, 'b': 'x' * i} for i in range(500)]
+        chunks = list(self.create_exporter(writer.CSVBytesOutputWriter(chunk_size=256)).stream(data, chunk_size=1024))
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(b''.join(chunks), self.create_exporter(writer.CSVBytesOutputWriter()).generate(data)[2])
+
+    def test_stream_xlsx(self):
+        data = [{'a': i, 'b': 'x' * i} for i in range(500)]
+        chunks = list(self.create_exporter(writer.XLSXBytesOutputWriter()).stream(data, chunk_size=1024))
+        self.assertGreater(len(chunks), 1)
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        self.assertTrue(all(info.flag_bits & 0x08 for info in archive.infolist()))
+        ws = openpyxl.load_workbook(io.BytesIO(b''.join(chunks))).active
+        self.assertEqual((ws.max_row, ws['B3'].value), (501, 'x'))
+
+    def test_set_output_moves_own_buffer_only(self):
+        output = writer.BytesOutputWriter()
+        output.write('abc')
+        target = io.BytesIO()
+        output.set_output(target)
+        output.write('def')
+        self.assertEqual(target.getvalue(), b'abcdef')
+
+        with self.assertRaises(RuntimeError):
+            output.set_output(io.BytesIO())
+        with self.assertRaises(RuntimeError):
+            writer.CSVBytesOutputWriter(output=io.BufferedWriter(io.BytesIO())).set_output(io.BytesIO())
+
+
+class TestCSVWriter(unittest.TestCase):
+    def test_encoding(self):
+        output = writer.CSVBytesOutputWriter(encoding='cp1252', bom=False, quoting=csv.QUOTE_ALL, chunk_size=8)
+        for i in range(3):
+            output.write(i, 'caf\xe9')
+        self.assertEqual(output.get_data(), b'"0";"caf\xe9"\r\n"1";"caf\xe9"\r\n"2";"caf\xe9"\r\n')
+
+    def test_write_rows(self):
+        rows = [(i, 'x' * i, None) for i in range(10)]
+        output = writer.CSVBytesOutputWriter(chunk_size=16)
+        output.rows_per_batch = 3
+        output.write_rows(iter(rows))
+
+        expected = writer.CSVBytesOutputWriter()
+        for row in rows:
+            expected.write(*row)
+        self.assertEqual(output.get_data(), expected.get_data())
+
+    def test_bom(self):
+        for encoding, bom, data in (
+            ('utf-8', b'\xef\xbb\xbf', b'a,1\n'),
+            ('utf-8-sig', b'\xef\xbb\xbf', b'a,1\n'),
+            ('utf-16-le', b'\xff\xfe', 'a,1\n'.encode('utf-16-le')),
+            ('utf-16', b'\xff\xfe', 'a,1\n'.encode('utf-16-le')),
+        ):
+            output = writer.CSVBytesOutputWriter(encoding=encoding, bom=True, delimiter=',', lineterminator='\n')
+            output.write('a', 1)
+            self.assertEqual(output.get_data(), bom + data)
+
+
+class TestAssetCache(unittest.TestCase):
+    def test_cache(self):
+        cache = utility.AssetCache(max_size=8)
+        loads = []
+
+        def loader(path):
+            loads.append(path)
+            return utility.read_bytes(path)
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ('a', 'b')]
+            for path in paths:
+                with open(path, 'wb') as fp:
+                    fp.write(b'1234')
+
+            self.assertEqual(cache.get(paths[0], 'bytes', loader), b'1234')
+            self.assertEqual(cache.get(paths[0], 'bytes', loader), b'1234')
+            self.assertEqual(len(loads), 1)
+
+            # Changed file is loaded again.
+            with open(paths[0], 'wb') as fp:
+                fp.write(b'123456')
+            self.assertEqual(cache.get(paths[0], 'bytes', loader), b'123456')
+            self.assertEqual(len(loads), 2)
+
+            # Least recently used asset is dropped.
+            cache.get(paths[1], 'bytes', loader)
+            self.assertEqual((len(cache), cache.size), (1, 4))
+
+    @unittest.skipUnless(PIL, 'Pillow is not installed')
+    def test_template_assets(self):
+        with tempfile.TemporaryDirectory() as directory:
+            class CSVTemplate(writer.OutputTemplate):
+                template_file = os.path.join(directory, 'template.csv')
+
+            class XLSXTemplate(writer.OutputTemplate):
+                images = [writer.OutputTemplate.image('B2', os.path.join(directory, 'image.png'), width=20)]
+
+            with open(CSVTemplate.template_file, 'w') as fp:
+                fp.write('Report;2020\n')
+            PIL.Image.new('RGB', (10, 10)).save(XLSXTemplate.images[0]['name'])
+
+            for _ in range(2):
+                self.assertEqual(writer.CSVBytesOutputWriter(template=CSVTemplate()).get_data(), b'Report;2020\r\n')
+                output = writer.XLSXBytesOutputWriter(template=XLSXTemplate())
+                self.assertEqual(output.ws._images[0].width, 20)
+                self.assertIn('xl/media/image1.png', zipfile.ZipFile(io.BytesIO(output.get_data())).namelist())
+
+            self.assertIn(('csv', ';'), {key[0] for key in utility.asset_cache._assets})
+
+
+class TestGenerateTo(unittest.TestCase):
+    create_exporter = TestStream.create_exporter
+
+    def test_generate_to_path(self):
+        data = [{'a': i, 'b': 'x'} for i in range(100)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.xlsx')
+            self.create_exporter(writer.XLSXBytesOutputWriter()).generate_to(data, path)
+            self.assertEqual(openpyxl.load_workbook(path).active.max_row, 101)
+
+    def test_writer_output(self):
+        data = [{'a': i, 'b': 'x'} for i in range(100)]
+        output = io.BytesIO()
+        self.create_exporter(writer.CSVBytesOutputWriter(output=output)).generate_to(data, output)
+        self.assertEqual(output.getvalue(), self.create_exporter(writer.CSVBytesOutputWriter()).generate(data)[2])
+
+
+class TestXLSXWriters(unittest.TestCase):
+    class Template(writer.OutputTemplate):
+        table_start = 'A3'
+
+    def get_values(self, output):
+        template = tpl.Object(titles=True, fields=[tpl.Field(1, 'A', 'a'), tpl.Field(2, 'B', 'b'), tpl.Field(4, 'C', 'c')])
+        data = [
+            {'a': i * 1.5, 'b': 'x\x01' if i == 3 else '<&> ' * i, 'c': datetime.date(2020, 1, i + 1) if i % 2 else True}
+            for i in range(10)
+        ]
+        content = Exporter(normalize.Normalizer(template), output).generate(data)[2]
+        return list(openpyxl.load_workbook(io.BytesIO(content)).worksheets[0].values)
+
+    def test_write_only_same_values(self):
+        self.assertEqual(
+            self.get_values(writer.XLSXBytesOutputWriter(template=self.Template(), write_only=True)),
+            self.get_values(writer.XLSXBytesOutputWriter(template=self.Template())),
+        )
+
+    def test_stream_writer_same_values(self):
+        expected = self.get_values(writer.XLSXBytesOutputWriter(template=self.Template()))
+        for shared_strings in (True, False):
+            output = writer.XLSXStreamOutputWriter(template=self.Template(), cols_dimensions={'A': 20}, shared_strings=shared_strings)
+            self.assertEqual(self.get_values(output), expected)
+
+    def test_stream_writer_shared_strings(self):
+        output = writer.XLSXStreamOutputWriter()
+        for i in range(10):
+            output.write(i, '---', 'Rolle', ' x ')
+        archive = zipfile.ZipFile(io.BytesIO(output.get_data()))
+        self.assertEqual(archive.read('xl/sharedStrings.xml').count(b'<si>'), 3)
+
+    def test_stream_writer_skips_not_finite_numbers(self):
+        output = writer.XLSXStreamOutputWriter()
+        output.write(1.5, float('nan'), float('inf'), 'x')
+        output.write(decimal.Decimal('NaN'), -float('inf'), decimal.Decimal('2.5'))
+        rows = list(openpyxl.load_workbook(io.BytesIO(output.get_data())).active.values)
+        self.assertEqual(rows, [(1.5, None, None, 'x'), (None, None, 2.5, None)])
+
+    def test_stream_writer_skips_empty_text(self):
+        class Empty:
+            def __str__(self):
+                return ''
+
+        for shared_strings in (True, False):
+            output = writer.XLSXStreamOutputWriter(shared_strings=shared_strings)
+            output.write(Empty(), 'x')
+            rows = list(openpyxl.load_workbook(io.BytesIO(output.get_data())).active.values)
+            self.assertEqual(rows, [(None, 'x')])
+
+    def test_stream_writer_template_file(self):
+        workbook = openpyxl.Workbook()
+        workbook.active['A1'] = 'Report'
+        workbook.active['A1'].font = openpyxl.styles.Font(bold=True)
+        workbook.active.merge_cells('A1:C1')
+        workbook.active['A5'] = 'replaced'
+        workbook.active['D30'] = 'below'
+        workbook.create_sheet('Other')['A1'] = 'other'
+
+        with tempfile.TemporaryDirectory() as directory:
+            class Template(self.Template):
+                template_file = os.path.join(directory, 'template.xlsx')
+            workbook.save(Template.template_file)
+
+            output = writer.XLSXStreamOutputWriter(template=Template(), max_rows_per_sheet=8)
+            self.assertEqual([row[:3] for row in self.get_values(output)[:2]], [('Report', None, None), (None,) * 3])
+            workbook = openpyxl.load_workbook(io.BytesIO(output.output.getvalue()))
+
+        self.assertEqual(workbook.sheetnames, ['Sheet', 'Other', 'Sheet2'])
+        self.assertEqual(workbook['Other']['A1'].value, 'other')
+        self.assertTrue(workbook['Sheet']['A1'].font.b)
+        self.assertEqual([str(cells) for cells in workbook['Sheet'].merged_cells.ranges], ['A1:C1'])
+        self.assertEqual(workbook['Sheet']['D30'].value, 'below')
+
+        rows = list(workbook['Sheet'].values)[3:8] + list(workbook['Sheet2'].values)[1:]
+        expected = self.get_values(writer.XLSXBytesOutputWriter(template=self.Template()))[3:]
+        self.assertEqual(rows, expected)
+
+    def test_compression(self):
+        expected = self.get_values(writer.XLSXBytesOutputWriter(template=self.Template()))
+        for cls in (writer.XLSXBytesOutputWriter, writer.XLSXStreamOutputWriter):
+            output = cls(template=self.Template(), compression=zipfile.ZIP_STORED)
+            self.assertEqual(self.get_values(output), expected)
+            archive = zipfile.ZipFile(io.BytesIO(output.output.getvalue()))
+            self.assertEqual({info.compress_type for info in archive.infolist()}, {zipfile.ZIP_STORED})
+
+            output = cls(template=self.Template(), compresslevel=1, compress_workers=2)
+            self.assertEqual(self.get_values(output), expected)
+
+    def test_parallel_deflater(self):
+        data = b''.join(str(random.random()).encode() for _ in range(50000))
+        with ThreadPoolExecutor(2) as executor:
+            deflater = utility.ParallelDeflater(executor, block_size=64 * 1024, max_pending=2)
+            chunks = [deflater.compress(data[i:i + 10000]) for i in range(0, len(data), 10000)]
+            compressed = b''.join(chunks) + deflater.flush()
+        self.assertEqual(zlib.decompress(compressed, -zlib.MAX_WBITS), data)
+
+    def test_max_rows_per_sheet(self):
+        template = tpl.Object(titles=True, fields=[tpl.Field(1, 'A', 'a')])
+        data = [{'a': i} for i in range(25)]
+        for output in (
+            writer.XLSXBytesOutputWriter(template=self.Template(), max_rows_per_sheet=10),
+            writer.XLSXBytesOutputWriter(template=self.Template(), max_rows_per_sheet=10, write_only=True),
+            writer.XLSXStreamOutputWriter(template=self.Template(), max_rows_per_sheet=10),
+        ):
+            content = Exporter(normalize.Normalizer(template), output).generate(data)[2]
+            workbook = openpyxl.load_workbook(io.BytesIO(content))
+            self.assertEqual(workbook.sheetnames, ['Sheet', 'Sheet2', 'Sheet3'])
+            sheets = [[row[0] for row in ws.values] for ws in workbook.worksheets]
+            self.assertEqual(sheets[0][:3], [None, None, 'A'])
+            self.assertEqual([rows[0] for rows in sheets[1:]], ['A', 'A'])
+            self.assertEqual(sheets[0][4:] + sheets[1][1:] + sheets[2][1:], list(range(1, 25)))
+
+
+class TestPDFWriter(unittest.TestCase):
+    def test_pages_are_drawn_incrementally(self):
+        output = writer.PDFBytesOutputWriter([0, 100], A4, header=[('ID', 'Name')])
+        for i in range(100):
+            output.write(i, 'x' * i)
+            self.assertLess(len(output.data), output.max_rows_per_page)
+        self.assertEqual(output.pages, 2)
+
+        with self.assertRaises(RuntimeError):
+            output.set_output(io.BytesIO())
+        data = output.get_data()
+        self.assertEqual(data.count(b'/Type /Page\n'), 3)
+
+        # Full pages share the grid form, the last page has its own.
+        self.assertEqual(data.count(b'/Subtype /Form'), 2)
+        self.assertEqual(data.count(b'/FormXob.grid1_49 '), 2)
+        self.assertEqual(data.count(b'/FormXob.grid1_3 '), 1)
+
+    def test_rows_per_page(self):
+        self.assertEqual(writer.PDFBytesOutputWriter([0], A4).max_rows_per_page, 49)
+        self.assertEqual(writer.PDFBytesOutputWriter([0], landscape(A4)).max_rows_per_page, 33)
+        self.assertEqual(writer.PDFBytesOutputWriter([0], letter).max_rows_per_page, 46)
+
+    def test_auto_offsets(self):
+        output = writer.PDFBytesOutputWriter(header=[('ID', 'Name')])
+        output.write(1, 'x' * 10)
+        output.write(22, 'y')
+        output.finish()
+
+        first, second = (max(writer.get_string_width(text, 'Helvetica', 12) + 4 for text in column) for column in (
+            ('ID', '1', '22'), ('Name', 'x' * 10, 'y'),
+        ))
+        self.assertEqual(output.offsets, [0, first, first + second])
+
+        output = writer.PDFBytesOutputWriter(pagesize=landscape(A4), clip=True)
+        output.write('x' * 200, 'y' * 200)
+        output.finish()
+        self.assertAlmostEqual(output.offsets[-1], landscape(A4)[0] - 100)
+        self.assertAlmostEqual(output.offsets[1], output.offsets[-1] / 2)
+
+    def test_auto_offsets_widen(self):
+        output = writer.PDFBytesOutputWriter()
+        for i in range(60):
+            output.write(i, 'x')
+        for i in range(5):
+            output.write(i, 'x', 'third', 'fourth', 'fifth')
+        data = output.get_data()
+
+        # Second page is laid out again for five columns, the first one keeps its grid.
+        self.assertEqual(len(output.offsets), 6)
+        self.assertLessEqual(output.offsets[-1], A4[0] - 100)
+        self.assertEqual(data.count(b'/FormXob.grid1_49 '), 1)
+        self.assertEqual(data.count(b'/FormXob.grid2_16 '), 1)
+
+        streams = re.findall(rb'stream\r?\n(.*?)endstream', data, re.S)
+        text = b''.join(zlib.decompress(base64.a85decode(stream.strip(), adobe=True)) for stream in streams)
+        self.assertTrue(all(word in text for word in (b'(third)', b'(fourth)', b'(fifth)')))
+
+    def test_clip_text(self):
+        output = writer.PDFBytesOutputWriter([0, 60], A4, clip=True)
+        self.assertEqual(output.widths, [56, A4[0] - 100 - 64])
+        self.assertEqual(output._clip_text('short', 56), 'short')
+
+        text = output._clip_text('a very long text which overflows', 56)
+        self.assertTrue(text.startswith('a very') and text.endswith('\u2026'))
+        self.assertLessEqual(writer.get_string_width(text, 'Helvetica', 12), 56)
+        self.assertEqual(output._clip_text('long', 1), '')
+
+
+class TestParallelNormalizer(RandomTemplates, unittest.TestCase):
+    def test_parallel_renders_same_rows(self):
+        for seed, create_template, data in self.create_cases(20):
+            template = create_template()
+            for item in [template] + template.sorted_nested:
+                item.offset_top = seed % 2 + 1
+            template.invalidate()
+
+            data = data * 3
+            expected = list(normalize.Normalizer(template).build_table(data))
+            rows = list(normalize.ParallelNormalizer(template, workers=2, chunk_size=2).build_table(data))
+            self.assertEqual(rows, expected, 'seed {}'.format(seed))
+
 
 if __name__ == '__main__':
     unittest.main()
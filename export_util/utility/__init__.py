@@ -1,2 +1,5 @@
 from export_util.utility.cachedprop import *    # noqa
-from export_util.utility.schematics import *    # noqa
\ No newline at end of file
+from export_util.utility.schematics import *    # noqa
+from export_util.utility.stream import *    # noqa
+from export_util.utility.archive import *    # noqa
+from export_util.utility.assets import *    # noqa
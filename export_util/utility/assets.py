@@ -0,0 +1,99 @@
+"""
+Process-wide cache of the template assets.
+"""
+import collections
+import os
+import threading
+
+
+class AssetCache:
+    """
+    Keeps assets loaded from the template files, like CSV prefix rows, template workbook bytes and images, so
+    repeated exports with the same template do no disk I/O or parsing.
+
+    Asset is loaded again when the modification time or the size of its file is changed. Least recently used
+    assets are dropped when the total size of the assets exceeds `max_size` bytes.
+    """
+    def __init__(self, max_size=64 * 1024 * 1024):
+        """
+        :param int max_size: Total size of the assets in bytes, caching is disabled if 0.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self._assets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._assets)
+
+    def get(self, path, kind, loader):
+        """
+        Returns the asset of the file, loaded by `loader` if it's not cached yet.
+        :param path: File path, file-like objects are passed to the loader as they are.
+        :param kind: Hashable kind of the asset, the same file could be loaded as different assets.
+        :param callable loader: Function, which takes the file path and returns `(asset, size in bytes)` tuple.
+        :return:
+        """
+        if not isinstance(path, (str, os.PathLike)):
+            return loader(path)[0]
+
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (kind, path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._assets.get(key)
+            if cached is not None and cached[0] == version:
+                self._assets.move_to_end(key)
+                return cached[1]
+
+        asset, size = loader(path)
+        with self._lock:
+            self._drop(key)
+            if size <= self.max_size:
+                self._assets[key] = (version, asset, size)
+                self.size += size
+                while self.size > self.max_size:
+                    self._drop(next(iter(self._assets)))
+        return asset
+
+    def clear(self):
+        """
+        Drops all assets.
+        :return:
+        """
+        with self._lock:
+            self._assets.clear()
+            self.size = 0
+
+    def _drop(self, key):
+        """
+        Drops the asset if it's cached.
+        :param key:
+        :return:
+        """
+        cached = self._assets.pop(key, None)
+        if cached is not None:
+            self.size -= cached[2]
+
+
+def read_bytes(path):
+    """
+    Loader of the file bytes.
+    :param path:
+    :return tuple:
+    """
+    if isinstance(path, (str, os.PathLike)):
+        with open(path, 'rb') as fp:
+            data = fp.read()
+    else:
+        data = path.read()
+    return data, len(data)
+
+
+# Cache which is shared by writers of the process.
+asset_cache = AssetCache()
+
+
+__all__ = ['AssetCache', 'asset_cache', 'read_bytes']
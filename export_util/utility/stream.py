@@ -0,0 +1,112 @@
+"""
+Output which passes the document to the client by chunks.
+"""
+import io
+import queue
+import threading
+
+
+class StreamOutput(io.RawIOBase):
+    """
+    Binary output which is not seekable, and keeps written bytes until
+    they are taken with `take()`.
+
+    Zip archives are written into such output with data descriptors after
+    each member, as the local headers can't be rewritten.
+    """
+    def __init__(self):
+        super(StreamOutput, self).__init__()
+        self._chunks = []
+        self._size = 0
+        self._position = 0
+
+        # Queue of the chunks written by `drain()` thread.
+        self._queue = None
+        self._chunk_size = None
+        self._abandoned = False
+
+    @property
+    def size(self):
+        """
+        Returns number of bytes which are not taken yet.
+        :return int:
+        """
+        return self._size
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self._abandoned:
+            raise OSError('Stream is closed by the client')
+
+        data = bytes(data)
+        self._chunks.append(data)
+        self._size += len(data)
+        self._position += len(data)
+
+        if self._queue is not None and self._size >= self._chunk_size:
+            self._queue.put(self.take())
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        """
+        Returns written bytes and forgets them.
+        :return bytes:
+        """
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self._size = 0
+        return data
+
+    def drain(self, write, chunk_size):
+        """
+        Calls `write` function in the thread, and yields chunks of about
+        `chunk_size` bytes while it writes into this output. So the big
+        document, which is written at once, is not kept in memory.
+        :param callable write:
+        :param int chunk_size:
+        :return generator:
+        """
+        done = object()
+        errors = []
+        chunks = self._queue = queue.Queue(2)
+        self._chunk_size = chunk_size
+
+        def run():
+            try:
+                write()
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                chunks.put(done)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            for chunk in iter(chunks.get, done):
+                yield chunk
+        finally:
+            # Let the writer fail on the next write if the client is gone.
+            self._abandoned = thread.is_alive()
+            while thread.is_alive():
+                try:
+                    chunks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+            self._queue = None
+            self._abandoned = False
+
+        if errors:
+            raise errors[0]
+
+        data = self.take()
+        if data:
+            yield data
+
+
+__all__ = ['StreamOutput']
@@ -16,6 +16,23 @@ def schema_model_to_dict(value):
     return value
 
 
+def io_bound(formatter):
+    """
+    Marks formatter as I/O-bound, e.g. it requests a database or a service.
+    Cells with such formatters are rendered by the thread pool for the next
+    objects while the current row is rendered, see `template.RenderContext`.
+
+        @value.io_bound
+        def artist_name(artist_id, obj: DataGetter = None):
+            return artists_service.get(artist_id).name
+
+    :param formatter:
+    :return:
+    """
+    formatter.io_bound = True
+    return formatter
+
+
 def any_to_string(value, obj: DataGetter = None):
     """
     This function converts any value to string.
@@ -124,6 +141,7 @@ def dict_to_string(output_format=None, default='---'):
 
 
 __all__ = [
+    'io_bound',
     'seconds_to_time', 'seconds_to_year',
     'milliseconds_to_time', 'milliseconds_to_year',
     'boolean_to_yn', 'boolean_to_10', 'boolean_to_sign', 'boolean_to_string',
@@ -1,17 +1,37 @@
+import codecs
 import csv
-from io import BytesIO, StringIO
+import datetime
+import functools
+import math
+import numbers
+import os
+import re
+import shutil
+import string
+from io import BytesIO
 from zipfile import ZipFile, ZIP_DEFLATED
 
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils.exceptions import IllegalCharacterError
 from openpyxl.writer.excel import ExcelWriter
 from openpyxl import Workbook, load_workbook
 
 ## PDF
 import itertools
 from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 ##
 
+from export_util.utility.archive import ParallelZipFile
+from export_util.utility.assets import asset_cache, read_bytes
+
+
+# Number of rows of the Excel worksheet.
+EXCEL_MAX_ROWS = 1048576
+
 
 class OutputTemplate:
     """
@@ -66,23 +86,93 @@ class BytesOutputWriter:
     Simple data writer.
 
     Data writer `write_row` calls when we already have the formatted columns list.
+
+    Sparse rows (`export_util.template.SparseRow`) are written by `write_sparse`, which handles only the set cells.
+
+    Document is written into `output`, which is any binary file-like object: a file, a pipe or a socket. It's the
+    in-memory buffer by default, and `get_data` returns its bytes. Otherwise call `finish` to complete the document.
+    `set_output` redirects the document into another output, this is how `Exporter.stream` passes the document by
+    chunks.
     """
     mime_type = 'application/octet-stream'
     extension = 'bin'
 
-    def __init__(self):
-        self.output = BytesIO()
+    def __init__(self, output=None):
+        """
+        :param output: Binary file-like object, in-memory buffer if None.
+        """
+        self.output = BytesIO() if output is None else output
+
+        # Whether the output is the in-memory buffer of the writer, its data could be moved then.
+        self._own_output = output is None
+
+        # Root titles rows, see `set_titles`.
+        self.titles = []
+
+    def set_titles(self, rows):
+        """
+        Sets root titles rows of the table. Writers could repeat them, e.g. at the top of each sheet.
+        :param rows:
+        :return:
+        """
+        self.titles = [list(row) for row in rows]
 
     def write(self, *cols):
         self.output.write(b''.join([x.encode() if isinstance(x, str) else x for x in cols]))
 
+    def write_sparse(self, row):
+        self.output.write(b''.join([x.encode() if isinstance(x, str) else x for _, x in row.items()]))
+
+    def write_rows(self, rows):
+        """
+        Writes rows of columns, see `write`.
+        :param rows:
+        :return:
+        """
+        write = self.write
+        for cols in rows:
+            write(*cols)
+
+    def set_output(self, output):
+        """
+        Redirects the document into the binary output. Data which is written already is moved to it, so the
+        writer's in-memory buffer could be redirected only.
+        :param output:
+        :return:
+        """
+        if output is self.output:
+            return
+        if not self._own_output:
+            raise RuntimeError('Output could not be changed, document is written into the passed output already')
+
+        output.write(self.output.getvalue())
+        self.output = output
+        self._own_output = False
+
+    def finish(self):
+        """
+        Completes the document at the output.
+        :return:
+        """
+
     def get_data(self):
+        self.finish()
         return self.output.getvalue()
 
 
 class XLSXBytesOutputWriter(BytesOutputWriter):
     """
     Returns bytes of the XLSX workbook object.
+
+    Worksheet is rolled over to the new one after `max_rows_per_sheet` rows, and root titles are repeated there.
+    `OutputTemplate.table_start` applies to the first sheet only.
+
+    With `write_only=True` rows are appended to the write-only workbook, which keeps them in the temporary file
+    instead of the cell objects, so the memory doesn't grow with the number of rows. `cols_dimensions` and
+    `OutputTemplate.table_start` and `images` are supported, `OutputTemplate.template_file` is not.
+
+    Archive is compressed with `compression` (`zipfile.ZIP_DEFLATED` or `zipfile.ZIP_STORED`) at `compresslevel`.
+    With `compress_workers` large parts like worksheets are deflated by blocks in that number of threads.
     """
     mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     extension = 'xlsx'
@@ -90,16 +180,40 @@ class XLSXBytesOutputWriter(BytesOutputWriter):
     INTCOL_MAP = {i: c for i, c in enumerate(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))}
     COLINT_MAP = {c: i for i, c in enumerate(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))}
 
-    def __init__(self, cols_dimensions=None, template=None):
-        super(XLSXBytesOutputWriter, self).__init__()
+    def __init__(self, cols_dimensions=None, template=None, output=None, write_only=False,
+                 max_rows_per_sheet=EXCEL_MAX_ROWS, compression=ZIP_DEFLATED, compresslevel=None,
+                 compress_workers=None):
+        super(XLSXBytesOutputWriter, self).__init__(output)
         self.start_col = 0
         self.start_row = 0
         self._current_row = 0
+        self.write_only = write_only
+        self.max_rows_per_sheet = max_rows_per_sheet
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.compress_workers = compress_workers
+        self.cols_dimensions = cols_dimensions if template is None else None
 
-        if template is not None:
+        if write_only:
+            if template is not None and template.template_file is not None:
+                raise ValueError('Template file is not supported by the write-only workbook')
+
+            self.wb = Workbook(write_only=True)
+            self.ws = self.wb.create_sheet()
+
+            # Cell which checks values before the row is appended.
+            self._cell = WriteOnlyCell(self.ws)
+
+            if template is not None:
+                self.from_template(template)
+            else:
+                self.resize_columns(cols_dimensions)
+        elif template is not None:
             if template.template_file is not None:
                 # Microsoft excel raises an error when using vba
-                self.wb = load_workbook(filename=template.template_file, keep_vba=False)
+                self.wb = load_workbook(
+                    filename=BytesIO(asset_cache.get(template.template_file, 'bytes', read_bytes)), keep_vba=False
+                )
             else:
                 self.wb = Workbook()
 
@@ -125,7 +239,7 @@ class XLSXBytesOutputWriter(BytesOutputWriter):
                 self.ws.column_dimensions[col].height = height
 
     def from_template(self, template=None):
-        if template.worksheet_index is not None:
+        if template.worksheet_index is not None and not self.write_only:
             self.ws = self.wb.worksheets[template.worksheet_index]
 
         if template.table_start is not None:
@@ -135,15 +249,20 @@ class XLSXBytesOutputWriter(BytesOutputWriter):
 
         if template.images:
             for image in template.images:
-                xlimg = openpyxl.drawing.image.Image(image['name'])
-                if image['size']:
-                    if image['size'][0]:
-                        xlimg.width = image['size'][0]
-                    if image['size'][1]:
-                        xlimg.height = image['size'][1]
+                xlimg = openpyxl.drawing.image.Image(BytesIO(asset_cache.get(image['name'], 'bytes', read_bytes)))
+                size = image.get('size') or {}
+                if size.get('width'):
+                    xlimg.width = size['width']
+                if size.get('height'):
+                    xlimg.height = size['height']
                 self.ws.add_image(xlimg, image['cell'])
 
     def write(self, *cols):
+        if self._current_row + self.start_row >= self.max_rows_per_sheet:
+            self._next_sheet()
+        if self.write_only:
+            return self._append(cols)
+
         for i, val in enumerate(cols):
             if not val:
                 continue
@@ -155,106 +274,1108 @@ class XLSXBytesOutputWriter(BytesOutputWriter):
 
         self._current_row += 1
 
-    def get_data(self):
-        archive = ZipFile(self.output, 'w', ZIP_DEFLATED, allowZip64=True)
+    def write_sparse(self, row):
+        if self._current_row + self.start_row >= self.max_rows_per_sheet:
+            self._next_sheet()
+        if self.write_only:
+            return self._append(row)
+
+        for i, val in row.items():
+            if not val:
+                continue
+
+            try:
+                self.ws.cell(row=self._current_row + self.start_row + 1, column=i+1, value=val)
+            except Exception as e:
+                print(e)
+
+        self._current_row += 1
+
+    def finish(self):
+        # Workbook is kept in memory, the archive is written at the end.
+        archive = self._open_archive()
         writer = ExcelWriter(self.wb, archive)
         try:
+            # `ExcelWriter.save()` writes data again, which duplicates archive members.
             writer.write_data()
-            writer.save()
         finally:
             archive.close()
 
-        return self.output.getvalue()
+    def _open_archive(self):
+        """
+        Opens the archive at the output with the compression options.
+        :return ParallelZipFile:
+        """
+        return ParallelZipFile(
+            self.output, 'w', self.compression, compresslevel=self.compresslevel, workers=self.compress_workers
+        )
+
+    def _next_sheet(self):
+        """
+        Starts the next worksheet with root titles.
+        :return:
+        """
+        if self.max_rows_per_sheet <= len(self.titles):
+            raise ValueError('Titles do not fit into {} rows of the sheet'.format(self.max_rows_per_sheet))
+
+        self.ws = self.wb.create_sheet("Sheet{}".format(len(self.wb.worksheets) + 1))
+        self.start_row = 0
+        self._current_row = 0
+        self.resize_columns(self.cols_dimensions)
+
+        for title in self.titles:
+            self.write(*title)
+
+    def _append(self, cols):
+        """
+        Appends row to the write-only worksheet.
+        :param cols:
+        :return:
+        """
+        if not self._current_row:
+            for _ in range(self.start_row):
+                self.ws.append([])
+
+        row = []
+        for val in cols:
+            if not val:
+                val = None
+            elif not isinstance(val, (int, float)):
+                # Worksheet is broken by the value which is failed on append,
+                # so the value is checked before.
+                try:
+                    if isinstance(val, str):
+                        if ILLEGAL_CHARACTERS_RE.search(val):
+                            raise IllegalCharacterError('{} cannot be used in worksheets.'.format(val))
+                    else:
+                        self._cell.value = val
+                except Exception as e:
+                    print(e)
+                    val = None
+            row.append(val)
+
+        self.ws.append(row)
+        self._current_row += 1
 
     def _get_column_name(self, cell_name):
         return cell_name[0]
 
 
+# Fixed parts of the workbook written by `XLSXStreamOutputWriter`.
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{}'
+    '</Types>'
+)
+
+_XLSX_SHEET_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+
+_XLSX_SHARED_STRINGS_TYPE = (
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+)
+
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{}</sheets>'
+    '</workbook>'
+)
+
+_XLSX_WORKBOOK_SHEET = '<sheet name="{0}" sheetId="{1}" r:id="rId{1}"/>'
+
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{}'
+    '<Relationship Id="styles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '{}'
+    '</Relationships>'
+)
+
+_XLSX_SHEET_REL = (
+    '<Relationship Id="rId{0}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{0}.xml"/>'
+)
+
+_XLSX_SHARED_STRINGS_REL = (
+    '<Relationship Id="sharedStrings" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+    'Target="sharedStrings.xml"/>'
+)
+
+# Cell styles are: general, date, date and time, time.
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd h:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+
+# Characters which are not allowed in XML.
+_XML_ILLEGAL_RE = re.compile(r'[\000-\010\013\014\016-\037]')
+
+_EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+
+class _XLSXTemplate:
+    """
+    Template workbook which is spliced at the bytes level. The worksheet part is split around its rows, so the
+    generated rows could be streamed into it. Other archive members are copied as they are, except the parts which
+    list sheets and cell styles: new sheets and date styles are inserted into their XML.
+    """
+
+    # Cell formats of dates, dates and times and times which are appended to the template styles.
+    date_formats = (14, 22, 21)
+
+    def __init__(self, template_file, worksheet_index, start_row):
+        """
+        :param template_file: Path or binary file-like object of the template workbook.
+        :param int worksheet_index: Index of the worksheet which the table is written into.
+        :param int start_row: Number of the template rows which are kept before the table.
+        """
+        self.archive = ZipFile(template_file)
+        self.parts = {}
+        self.extra_sheets = []
+
+        workbook = self.archive.read('xl/workbook.xml')
+        rels = self.archive.read('xl/_rels/workbook.xml.rels')
+        sheets = re.findall(rb'<sheet\b[^>]*>', workbook)
+        self.sheet_names = {self._get_attribute(sheet, b'name') for sheet in sheets}
+        self.sheet_id = max(int(self._get_attribute(sheet, b'sheetId')) for sheet in sheets)
+
+        rel_id = self._get_attribute(sheets[worksheet_index or 0], b'id')
+        for rel in re.findall(rb'<Relationship\b[^>]*>', rels):
+            if self._get_attribute(rel, b'Id') == rel_id:
+                target = self._get_attribute(rel, b'Target')
+                break
+        else:
+            raise ValueError('Worksheet {} is not found in the template'.format(worksheet_index))
+        self.sheet_part = target[1:] if target.startswith('/') else 'xl/' + target
+
+        # Calculation chain refers to the cells which could be replaced, Excel rebuilds it.
+        self.parts['[Content_Types].xml'] = re.sub(
+            rb'<Override\b[^>]*calcChain[^>]*/>', b'', self.archive.read('[Content_Types].xml')
+        )
+        self.parts['xl/_rels/workbook.xml.rels'] = re.sub(rb'<Relationship\b[^>]*calcChain[^>]*/>', b'', rels)
+        self.parts['xl/calcChain.xml'] = None
+        self.parts['xl/workbook.xml'] = workbook
+        self.parts[self.sheet_part] = None
+        self._set_styles()
+        self._split_sheet(start_row)
+
+    def _set_styles(self):
+        """
+        Appends date styles to the cell formats of the template.
+        :return:
+        """
+        styles = self.archive.read('xl/styles.xml')
+        match = re.search(rb'<cellXfs\b[^>]*\bcount="(\d+)"[^>]*>', styles)
+        end = styles.find(b'</cellXfs>')
+        if match is None or end < 0:
+            raise ValueError('Cell formats are not found in the template styles')
+
+        count = int(match.group(1))
+        self.date_styles = tuple(range(count, count + len(self.date_formats)))
+        xfs = ''.join(
+            '<xf numFmtId="{}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'.format(x)
+            for x in self.date_formats
+        ).encode()
+        self.parts['xl/styles.xml'] = b''.join((
+            styles[:match.start(1)], str(count + len(self.date_formats)).encode(), styles[match.end(1):end],
+            xfs, styles[end:],
+        ))
+
+    def _split_sheet(self, start_row):
+        """
+        Splits the worksheet XML into the head with the rows before the table and the tail after the rows. Template
+        rows from the table start are kept aside, see `get_sheet_tail`.
+        :param int start_row:
+        :return:
+        """
+        sheet = self.archive.read(self.sheet_part)
+        match = re.search(rb'<sheetData\s*/>|<sheetData>(.*?)</sheetData>', sheet, re.S)
+        if match is None:
+            raise ValueError('Rows are not found in the template worksheet')
+
+        rows = []
+        self.sheet_rows = []
+        number = 0
+        for row in re.finditer(rb'<row\b[^>]*?(?:/>|>.*?</row>)', match.group(1) or b'', re.S):
+            row = row.group(0)
+            attribute = self._get_attribute(row[:row.find(b'>')], b'r')
+            number = int(attribute) if attribute else number + 1
+            if number <= start_row:
+                rows.append(row)
+            else:
+                # Row number is set explicitly, as the rows before are replaced by the table.
+                if not attribute:
+                    row = b'<row r="%d"' % number + row[4:]
+                self.sheet_rows.append((number, row))
+
+        # Dimension of the template is outdated by the table, it's optional.
+        head = re.sub(rb'<dimension\b[^>]*/>', b'', sheet[:match.start()])
+        self.sheet_head = head + b'<sheetData>' + b''.join(rows)
+        self.sheet_tail = b'</sheetData>' + sheet[match.end():]
+
+    def get_sheet_tail(self, last_row):
+        """
+        Returns the end of the worksheet XML, with the template rows below the table. Rows which are covered by
+        the table are replaced by it.
+        :param int last_row: Number of the last row of the table.
+        :return bytes:
+        """
+        return b''.join(row for number, row in self.sheet_rows if number > last_row) + self.sheet_tail
+
+    def add_sheet(self):
+        """
+        Adds the sheet after the template ones.
+        :return str: Archive name of the sheet part.
+        """
+        index = len(self.extra_sheets) + 1
+        name = 'xl/worksheets/export{}.xml'.format(index)
+        self.extra_sheets.append(name)
+        return name
+
+    def write_parts(self, archive):
+        """
+        Writes template parts into the archive, except the worksheet of the table.
+        :param archive:
+        :return:
+        """
+        parts = dict(self.parts)
+        if self.extra_sheets:
+            self._add_sheets(parts)
+
+        for info in self.archive.infolist():
+            content = parts.get(info.filename, False)
+            if content is False:
+                with self.archive.open(info) as src, archive.open(info.filename, 'w', force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst)
+            elif content is not None:
+                archive.writestr(info.filename, content)
+        self.archive.close()
+
+    def _add_sheets(self, parts):
+        """
+        Lists extra sheets in the workbook, its relationships and content types.
+        :param dict parts:
+        :return:
+        """
+        number = 1
+        sheets = []
+        rels = []
+        types = []
+        for i, part in enumerate(self.extra_sheets, 1):
+            number += 1
+            while 'Sheet{}'.format(number) in self.sheet_names:
+                number += 1
+
+            sheets.append('<sheet name="Sheet{}" sheetId="{}" r:id="rIdExport{}"/>'.format(number, self.sheet_id + i, i))
+            rels.append(
+                '<Relationship Id="rIdExport{}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                'Target="/{}"/>'.format(i, part)
+            )
+            types.append(
+                '<Override PartName="/{}" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'.format(part)
+            )
+
+        for name, end, content in (
+            ('xl/workbook.xml', b'</sheets>', sheets),
+            ('xl/_rels/workbook.xml.rels', b'</Relationships>', rels),
+            ('[Content_Types].xml', b'</Types>', types),
+        ):
+            part = parts[name]
+            index = part.rfind(end)
+            parts[name] = part[:index] + ''.join(content).encode() + part[index:]
+
+    @staticmethod
+    def _get_attribute(tag, name):
+        """
+        Returns attribute value of the XML tag, namespace prefix of the attribute is ignored.
+        :param bytes tag:
+        :param bytes name:
+        :return str: Attribute value, None if it's not set.
+        """
+        match = re.search(rb'\s(?:\w+:)?' + name + rb'="([^"]*)"', tag)
+        return match.group(1).decode() if match else None
+
+
+class XLSXStreamOutputWriter(BytesOutputWriter):
+    """
+    Writes XLSX workbook without openpyxl. Rows are written into the worksheet XML as they come, and the XML is
+    compressed into the archive at the output at once, so neither cells nor rows are kept in memory.
+
+    Numbers and booleans are written as they are, dates and times as numbers with the date format, any other value
+    as the string. Each distinct string is kept once in the shared strings table, which is written at the end. Pass
+    `shared_strings=False` to write strings into cells instead, when they are mostly unique: the table is not kept in
+    memory then, but the file is bigger.
+
+    Worksheet is rolled over to the new one after `max_rows_per_sheet` rows, and root titles are repeated there.
+    Compression options are the same as of `XLSXBytesOutputWriter`.
+
+    With `OutputTemplate.template_file` the template workbook isn't loaded: rows are streamed into its worksheet
+    after the template rows before `table_start`, and other parts of the template are copied as they are. Strings
+    are written into cells then, and `cols_dimensions` applies to the next sheets only.
+
+    Like `XLSXBytesOutputWriter` it skips empty values, prints and skips strings which can't be written to XML,
+    supports `cols_dimensions` widths and `OutputTemplate.table_start`. Images are not supported.
+    """
+    mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+
+    # Number of bytes of rows XML which are compressed at once.
+    buffer_size = 64 * 1024
+
+    def __init__(self, cols_dimensions=None, template=None, output=None, shared_strings=True,
+                 max_rows_per_sheet=EXCEL_MAX_ROWS, compression=ZIP_DEFLATED, compresslevel=None,
+                 compress_workers=None):
+        super(XLSXStreamOutputWriter, self).__init__(output)
+        self.shared_strings = shared_strings
+        self.max_rows_per_sheet = max_rows_per_sheet
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.compress_workers = compress_workers
+        self.start_row = 0
+        self._current_row = 0
+        self._sheets = 0
+        self._cols_dimensions = cols_dimensions or {}
+        self._template_file = None
+        self._worksheet_index = 0
+
+        # Styles of dates, dates and times and times.
+        self._date_styles = (1, 2, 3)
+
+        if template is not None:
+            if template.images:
+                raise ValueError('Images are not supported by the stream writer')
+            if template.table_start is not None:
+                self.start_row = int(template.table_start.lstrip(string.ascii_uppercase)) - 1
+            if template.template_file is not None:
+                self._template_file = template.template_file
+                self._worksheet_index = template.worksheet_index
+                self.shared_strings = False
+
+        self._columns = []
+        self._archive = None
+        self._template = None
+        self._sheet = None
+        self._sheet_tail = None
+        self._buffer = []
+        self._buffer_length = 0
+
+        # Shared strings indexes, their XML and number of the cells which are using them.
+        self._strings = {}
+        self._strings_xml = []
+        self._strings_count = 0
+
+    def set_output(self, output):
+        if self._archive is not None:
+            raise RuntimeError('Output could not be changed after the writing is started')
+        self.output = output
+
+    def write(self, *cols):
+        self._write_row(enumerate(cols))
+
+    def write_sparse(self, row):
+        self._write_row(row.items())
+
+    def finish(self):
+        if self._archive is None:
+            self._start()
+        self._finish_sheet()
+
+        if self._template is not None:
+            self._template.write_parts(self._archive)
+            self._archive.close()
+            return
+
+        if self.shared_strings:
+            self._write_shared_strings()
+
+        sheets = range(1, self._sheets + 1)
+        types = ''.join(_XLSX_SHEET_TYPE.format(i) for i in sheets)
+        rels = ''.join(_XLSX_SHEET_REL.format(i) for i in sheets)
+        names = ''.join(_XLSX_WORKBOOK_SHEET.format('Sheet{}'.format(i if i > 1 else ''), i) for i in sheets)
+
+        for name, content in (
+            ('[Content_Types].xml', _XLSX_CONTENT_TYPES.format(
+                types + (_XLSX_SHARED_STRINGS_TYPE if self.shared_strings else '')
+            )),
+            ('_rels/.rels', _XLSX_RELS),
+            ('xl/workbook.xml', _XLSX_WORKBOOK.format(names)),
+            ('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS.format(
+                rels, _XLSX_SHARED_STRINGS_REL if self.shared_strings else ''
+            )),
+            ('xl/styles.xml', _XLSX_STYLES),
+        ):
+            self._archive.writestr(name, content)
+        self._archive.close()
+
+    def _open_archive(self):
+        """
+        Opens the archive at the output with the compression options.
+        :return ParallelZipFile:
+        """
+        return ParallelZipFile(
+            self.output, 'w', self.compression, compresslevel=self.compresslevel, workers=self.compress_workers
+        )
+
+    def _write_shared_strings(self):
+        """
+        Writes the shared strings table.
+        :return:
+        """
+        with self._archive.open('xl/sharedStrings.xml', 'w', force_zip64=True) as table:
+            table.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{}" uniqueCount="{}">'
+            ).format(self._strings_count, len(self._strings_xml)).encode())
+
+            strings = self._strings_xml
+            step = 4096
+            for start in range(0, len(strings), step):
+                table.write(''.join(strings[start:start + step]).encode())
+            table.write(b'</sst>')
+
+    def _start(self):
+        """
+        Starts the archive and the first worksheet.
+        :return:
+        """
+        if self.max_rows_per_sheet <= self.start_row or self.max_rows_per_sheet <= len(self.titles):
+            raise ValueError('Titles or table start do not fit into {} rows of the sheet'.format(self.max_rows_per_sheet))
+
+        if self._template_file is not None:
+            self._template = _XLSXTemplate(
+                BytesIO(asset_cache.get(self._template_file, 'bytes', read_bytes)), self._worksheet_index, self.start_row
+            )
+            self._date_styles = self._template.date_styles
+
+        self._archive = self._open_archive()
+        self._start_sheet()
+
+    def _next_sheet(self):
+        """
+        Finishes the current worksheet and starts the next one with root titles.
+        :return:
+        """
+        self._finish_sheet()
+        self.start_row = 0
+        self._current_row = 0
+        self._start_sheet()
+
+        for title in self.titles:
+            self._write_cells(enumerate(title))
+
+    def _finish_sheet(self):
+        """
+        Writes the end of the current worksheet XML.
+        :return:
+        """
+        self._flush()
+        if self._sheet_tail is None:
+            self._sheet.write(self._template.get_sheet_tail(self._current_row + self.start_row))
+        else:
+            self._sheet.write(self._sheet_tail)
+        self._sheet.close()
+
+    def _start_sheet(self):
+        """
+        Starts the worksheet XML.
+        :return:
+        """
+        self._sheets += 1
+        self._sheet_tail = b'</sheetData></worksheet>'
+        if self._template is None:
+            name = 'xl/worksheets/sheet{}.xml'.format(self._sheets)
+        elif self._sheets == 1:
+            # Template worksheet is continued.
+            self._sheet = self._archive.open(self._template.sheet_part, 'w', force_zip64=True)
+            self._sheet.write(self._template.sheet_head)
+
+            # Template rows below the table are written at the end, see `_finish_sheet()`.
+            self._sheet_tail = None
+            return
+        else:
+            name = self._template.add_sheet()
+        self._sheet = self._archive.open(name, 'w', force_zip64=True)
+
+        cols = []
+        for col, dimension in sorted(self._cols_dimensions.items(), key=lambda x: (len(x[0]), x[0])):
+            width = dimension.get('width') if isinstance(dimension, dict) else dimension
+            if width:
+                cols.append('<col min="{0}" max="{0}" width="{1}" customWidth="1"/>'.format(
+                    self._get_column_index(col), width
+                ))
+
+        header = _XLSX_SHEET_START
+        if cols:
+            header += '<cols>{}</cols>'.format(''.join(cols))
+        self._sheet.write((header + '<sheetData>').encode())
+
+    def _write_row(self, cells):
+        """
+        Writes row of the (column index, value) cells, at the next sheet if
+        the current one is full.
+        :param cells:
+        :return:
+        """
+        if self._archive is None:
+            self._start()
+        elif self._current_row + self.start_row >= self.max_rows_per_sheet:
+            self._next_sheet()
+        self._write_cells(cells)
+
+    def _write_cells(self, cells):
+        """
+        Writes row XML of the (column index, value) cells.
+        :param cells:
+        :return:
+        """
+        row = str(self._current_row + self.start_row + 1)
+        self._current_row += 1
+
+        columns = self._columns
+        xml = []
+        for i, val in cells:
+            if not val:
+                continue
+
+            while i >= len(columns):
+                columns.append(self._get_column_name(len(columns)))
+            ref = columns[i] + row
+
+            cls = type(val)
+            if cls is str:
+                xml.append(self._get_string_cell(ref, val))
+            elif cls is int:
+                xml.append('<c r="{}"><v>{}</v></c>'.format(ref, repr(val)))
+            elif cls is float:
+                # NaN and infinity have no XLSX value, they are skipped as illegal strings are.
+                if math.isfinite(val):
+                    xml.append('<c r="{}"><v>{}</v></c>'.format(ref, repr(val)))
+            elif cls is bool:
+                xml.append('<c r="{}" t="b"><v>1</v></c>'.format(ref))
+            else:
+                xml.append(self._get_value_cell(ref, val))
+
+        if not xml:
+            return
+
+        xml = '<row r="{}">{}</row>'.format(row, ''.join(xml))
+        self._buffer.append(xml)
+        self._buffer_length += len(xml)
+        if self._buffer_length >= self.buffer_size:
+            self._flush()
+
+    def _flush(self):
+        """
+        Compresses buffered rows XML.
+        :return:
+        """
+        if self._buffer:
+            self._sheet.write(''.join(self._buffer).encode())
+            self._buffer = []
+            self._buffer_length = 0
+
+    def _add_string(self, val):
+        """
+        Adds string into the shared strings table.
+        :param str val:
+        :return int: Index of the string, -1 if the string can't be written.
+        """
+        text = self._get_text(val)
+        if text is None:
+            index = -1
+        else:
+            index = len(self._strings_xml)
+            self._strings_xml.append('<si>{}</si>'.format(text))
+        self._strings[val] = index
+        return index
+
+    def _get_string_cell(self, ref, val):
+        """
+        Returns XML of the string cell.
+        :param str ref:
+        :param str val:
+        :return str:
+        """
+        if self.shared_strings:
+            index = self._strings.get(val)
+            if index is None:
+                index = self._add_string(val)
+            if index < 0:
+                return ''
+            self._strings_count += 1
+            return '<c r="{}" t="s"><v>{}</v></c>'.format(ref, index)
+
+        text = self._get_text(val)
+        if text is None:
+            return ''
+        return '<c r="{}" t="inlineStr"><is>{}</is></c>'.format(ref, text)
+
+    @staticmethod
+    def _get_text(val):
+        """
+        Returns text element XML of the string, None if the string can't be written.
+        :param str val:
+        :return str:
+        """
+        if '&' in val:
+            val = val.replace('&', '&amp;')
+        if '<' in val:
+            val = val.replace('<', '&lt;')
+        if '>' in val:
+            val = val.replace('>', '&gt;')
+        if _XML_ILLEGAL_RE.search(val):
+            print('{} cannot be used in worksheets.'.format(val))
+            return None
+
+        if val[0].isspace() or val[-1].isspace():
+            return '<t xml:space="preserve">{}</t>'.format(val)
+        return '<t>{}</t>'.format(val)
+
+    def _get_value_cell(self, ref, val):
+        """
+        Returns XML of the cell of any other type.
+        :param str ref:
+        :param val:
+        :return str:
+        """
+        if isinstance(val, datetime.datetime):
+            delta = val.replace(tzinfo=None) - _EXCEL_EPOCH
+            return '<c r="{}" s="{}"><v>{!r}</v></c>'.format(
+                ref, self._date_styles[1], delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+            )
+        if isinstance(val, datetime.date):
+            return '<c r="{}" s="{}"><v>{}</v></c>'.format(ref, self._date_styles[0], (val - _EXCEL_EPOCH.date()).days)
+        if isinstance(val, datetime.time):
+            seconds = val.hour * 3600 + val.minute * 60 + val.second + val.microsecond / 1e6
+            return '<c r="{}" s="{}"><v>{!r}</v></c>'.format(ref, self._date_styles[2], seconds / 86400)
+        if isinstance(val, bool):
+            return '<c r="{}" t="b"><v>1</v></c>'.format(ref)
+        if isinstance(val, numbers.Number) and not isinstance(val, complex):
+            if not math.isfinite(val):
+                return ''
+            return '<c r="{}"><v>{}</v></c>'.format(ref, val)
+
+        # Empty text is skipped, as empty values are.
+        text = str(val)
+        if not text:
+            return ''
+        return self._get_string_cell(ref, text)
+
+    @staticmethod
+    def _get_column_name(index):
+        """
+        Returns column letters by zero-based index.
+        :param int index:
+        :return str:
+        """
+        name = ''
+        index += 1
+        while index:
+            index, rest = divmod(index - 1, 26)
+            name = chr(65 + rest) + name
+        return name
+
+    @staticmethod
+    def _get_column_index(name):
+        """
+        Returns one-based column index by letters.
+        :param str name:
+        :return int:
+        """
+        index = 0
+        for char in name.upper():
+            index = index * 26 + ord(char) - 64
+        return index
+
+
+class _TextBuffer:
+    """
+    Text output of `csv.writer`, which keeps the text until it's taken to be encoded.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.length += len(text)
+
+    def take(self):
+        """
+        Returns the text and clears the buffer.
+        :return str:
+        """
+        text = ''.join(self.chunks)
+        self.chunks = []
+        self.length = 0
+        return text
+
+
 class CSVBytesOutputWriter(BytesOutputWriter):
     """
     CSV Data Writer.
+
+    Rows are formatted by `csv.writer` with the `dialect` and its format parameters like `quoting`, and the text is
+    encoded into the binary output by chunks of about `chunk_size` characters, so neither the text nor the whole
+    document is kept in memory. `get_data` returns bytes.
+
+    Pass `bom=True` to start the document with the byte order mark, which Excel needs to detect UTF-8. UTF-16 and
+    UTF-32 codecs and UTF-8-SIG write it anyway.
     """
     mime_type = 'text/csv'
     extension = 'csv'
 
-    def __init__(self, delimiter=';', template=None):
-        super(CSVBytesOutputWriter, self).__init__()
+    # Number of rows which are formatted by `write_rows` at once.
+    rows_per_batch = 1000
+
+    def __init__(self, delimiter=';', template=None, output=None, encoding='utf-8', errors='strict', bom=False,
+                 dialect='excel', chunk_size=64 * 1024, **fmtparams):
+        super(CSVBytesOutputWriter, self).__init__(output)
 
-        self.output = StringIO()
-        self.writer = csv.writer(self.output, delimiter=delimiter)
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+
+        codec = codecs.lookup(encoding)
+        self._encoder = codec.incrementalencoder(errors)
+        self._buffer = _TextBuffer()
+        self.writer = csv.writer(self._buffer, dialect=dialect, delimiter=delimiter, **fmtparams)
+
+        if bom and codec.name not in ('utf-8-sig', 'utf-16', 'utf-32'):
+            self._buffer.write('\ufeff')
 
         if template is not None:
             if template.template_file is not None:
-                with open(template.template_file, 'r') as feed:
-                    reader = csv.reader(feed, delimiter=delimiter)
-                    for row in reader:
-                        self.write(*row)
-                feed.close()
+                self.write_rows(asset_cache.get(
+                    template.template_file, ('csv', delimiter), lambda path: self._read_template(path, delimiter)
+                ))
 
 
     def write(self, *cols):
-        self.writer.writerow([x for x in cols])
+        self.writer.writerow(cols)
+        if self._buffer.length >= self.chunk_size:
+            self._flush()
 
-    def get_data(self):
-        return self.output.getvalue()
+    def write_sparse(self, row):
+        self.writer.writerow(row.to_list())
+        if self._buffer.length >= self.chunk_size:
+            self._flush()
+
+    def write_rows(self, rows):
+        rows = iter(rows)
+        while True:
+            # Rows are formatted by batches, and the text is encoded between them.
+            batch = list(itertools.islice(rows, self.rows_per_batch))
+            if not batch:
+                break
+            self.writer.writerows(batch)
+            if self._buffer.length >= self.chunk_size:
+                self._flush()
+
+    def set_output(self, output):
+        self._flush()
+        super(CSVBytesOutputWriter, self).set_output(output)
+
+    def finish(self):
+        self._flush()
+        self.output.write(self._encoder.encode('', True))
+        if hasattr(self.output, 'flush'):
+            self.output.flush()
+
+    @staticmethod
+    def _read_template(path, delimiter):
+        """
+        Loader of the template rows, see `AssetCache.get`.
+        :param path:
+        :param str delimiter:
+        :return tuple:
+        """
+        with open(path, 'r') as feed:
+            return [row for row in csv.reader(feed, delimiter=delimiter)], os.path.getsize(path)
+
+    def _flush(self):
+        """
+        Encodes buffered text into the output.
+        :return:
+        """
+        if self._buffer.length:
+            self.output.write(self._encoder.encode(self._buffer.take()))
+
+
+@functools.lru_cache(maxsize=64 * 1024)
+def get_string_width(text, font_name, font_size):
+    """
+    Returns width of the text in points, measurements are cached.
+    :param str text:
+    :param str font_name:
+    :param float font_size:
+    :return float:
+    """
+    return stringWidth(text, font_name, font_size)
 
 
 class PDFBytesOutputWriter(BytesOutputWriter):
     """
     PDF Data Writer.
+
+    Rows are drawn page by page as they come: rows of the current page only are kept, and the page is drawn as soon as
+    it's full. The document is saved into the output by `finish`.
+
+    Grid of the page is drawn once as the form, which pages refer to. The last page, which is not full, has the form
+    of its own. Text of the page is drawn by the single text object, column by column.
+
+    With `clip=True` text which is wider than its column is cut and ends with the ellipsis, so it doesn't overflow into
+    the next column. The last column ends at the right margin.
+
+    Number of rows of the page is computed from the page size, unless `max_rows_per_page` is set. Without `offsets`
+    columns are as wide as the widest text of the first page rows, and are narrowed to fit into the page if needed.
+    When rows of the later page have more cells, columns are laid out again with the new ones, from that page on.
     """
     mime_type = 'text/pdf'
     extension = 'pdf'
 
-    def grouper(self, iterable, n):
-        args = [iter(iterable)] * n
-        return itertools.zip_longest(*args)
+    # Number of rows of the page, computed from the page size if None.
+    max_rows_per_page = None
 
-    def __init__(self, offsets, pagesize, header=None):
-        super(PDFBytesOutputWriter, self).__init__()
+    # Margin.
+    x_offset = 50
+    y_offset = 50
 
-        self.output = BytesIO()
-        self.writer = canvas.Canvas(self.output)
+    # Space between rows.
+    padding = 15
 
-        self.offsets = offsets
-        if header:
-            self.data = header
-        else:
-            self.data = []
+    font_name = 'Helvetica'
+    font_size = 12
 
+    def __init__(self, offsets=None, pagesize=A4, header=None, output=None, clip=False):
+        super(PDFBytesOutputWriter, self).__init__(output)
+
+        self.clip = clip
+
+        # Rows of the current page.
+        self.data = []
+        self.pages = 0
+
+        # Names of the grid forms which are drawn already, and the number of the columns layouts they are drawn for.
+        self._grids = set()
+        self._layouts = 0
+
+        # Page size
         self.w = pagesize[0]
         self.h = pagesize[1]
+        self.writer = self._create_canvas()
+
+        if self.max_rows_per_page is None:
+            self.max_rows_per_page = max(int((self.h - 2 * self.y_offset) // self.padding), 1)
+        self.ylist = [self.h - self.y_offset - i * self.padding for i in range(self.max_rows_per_page + 1)]
+
+        # Columns are laid out by the first page rows, if offsets are not set. Text widths of the columns are kept
+        # to lay them out again, when the wider rows come.
+        self.offsets = self.xlist = self.widths = None
+        self._text_widths = None
+        if offsets is not None:
+            self._set_offsets(offsets)
+        else:
+            self._text_widths = []
+
+        for row in header or ():
+            self.write(*row)
 
     def write(self, *cols):
-        self.data.append(cols)
+        # Empty rows are skipped.
+        if cols:
+            self.data.append(cols)
+            if len(self.data) >= self.max_rows_per_page:
+                self._draw_page()
 
+    def write_sparse(self, row):
+        self.write(*row.to_list())
 
-    def get_data(self):
-        # Page size
-        w = self.w
-        h = self.h
-
-        max_rows_per_page = 45
-        # Margin.
-        x_offset = 50
-        y_offset = 50
-        # Space between rows.
-        padding = 15
-
-        xlist = [x + x_offset for x in self.offsets]
-        ylist = [h - y_offset - i * padding for i in range(max_rows_per_page + 1)]
-
-        for rows in self.grouper(self.data, max_rows_per_page):
-            rows = tuple(filter(bool, rows))
-            self.writer.grid(xlist, ylist[:len(rows) + 1])
-            for y, row in zip(ylist[:-1], rows):
-                for x, cell in zip(xlist, row):
-                    self.writer.drawString(x + 2, y - padding + 3, str(cell))
-            self.writer.setPageSize((w, h))
-            self.writer.showPage()
+    def set_output(self, output):
+        if output is self.output:
+            return
+        if self.pages:
+            raise RuntimeError('Output could not be changed after the pages are drawn')
+
+        # Nothing is drawn yet, canvas just starts over.
+        self.output = output
+        self.writer = self._create_canvas()
+        self._grids = set()
 
+    def finish(self):
+        if self.data:
+            self._draw_page()
         self.writer.save()
-        return self.output.getvalue()
+
+    def _draw_page(self):
+        """
+        Draws the page of the buffered rows and drops them.
+        :return:
+        """
+        rows = self.data
+        if self._text_widths is not None:
+            columns = max(len(row) for row in rows)
+            if self.offsets is None or columns > len(self._text_widths):
+                self._text_widths.extend(self._get_text_widths(rows, len(self._text_widths)))
+                self._set_offsets(self._get_auto_offsets(self._text_widths))
+        self.writer.doForm(self._get_grid(len(rows)))
+
+        # Cursor moves to the next row of the column by the leading.
+        text = self.writer.beginText()
+        text.setLeading(self.padding)
+        for i, x in enumerate(self.xlist):
+            cells = [str(row[i]) if i < len(row) else '' for row in rows]
+            while cells and not cells[-1]:
+                cells.pop()
+            if not cells:
+                continue
+
+            text.setTextOrigin(x + 2, self.ylist[0] - self.padding + 3)
+            for cell in cells:
+                text.textLine(self._clip_text(cell, self.widths[i]) if self.clip and cell else cell)
+        self.writer.drawText(text)
+        self.writer.showPage()
+
+        self.data = []
+        self.pages += 1
+
+    def _set_offsets(self, offsets):
+        """
+        Sets left offsets of the columns.
+        :param list offsets:
+        :return:
+        """
+        self.offsets = offsets
+        self.xlist = [x + self.x_offset for x in offsets]
+        self._layouts += 1
+
+        # Width of the text in each column.
+        self.widths = [b - a - 4 for a, b in zip(self.xlist, self.xlist[1:] + [self.w - self.x_offset])]
+
+    def _get_text_widths(self, rows, start):
+        """
+        Returns widths of the widest text of the sample rows, of the columns from `start`.
+        :param list rows:
+        :param int start: Index of the first column.
+        :return list:
+        """
+        widths = []
+        for row in rows:
+            for i, cell in enumerate(row[start:]):
+                width = get_string_width(str(cell), self.font_name, self.font_size) + 4
+                if i == len(widths):
+                    widths.append(width)
+                elif width > widths[i]:
+                    widths[i] = width
+        return widths
+
+    def _get_auto_offsets(self, widths):
+        """
+        Returns offsets of the columns of the text widths. The last offset is the right border of the table.
+        :param list widths:
+        :return list:
+        """
+        # Narrow columns proportionally to fit into the page.
+        available = self.w - 2 * self.x_offset
+        total = sum(widths)
+        if total > available:
+            widths = [width * available / total for width in widths]
+
+        offsets = [0]
+        for width in widths:
+            offsets.append(offsets[-1] + width)
+        return offsets
+
+    def _create_canvas(self):
+        """
+        Returns canvas of the document at the output.
+        :return canvas.Canvas:
+        """
+        return canvas.Canvas(
+            self.output, pagesize=(self.w, self.h), initialFontName=self.font_name, initialFontSize=self.font_size
+        )
+
+    def _clip_text(self, text, width):
+        """
+        Returns the text which fits into the width, cut text ends with the ellipsis.
+        :param str text:
+        :param float width:
+        :return str:
+        """
+        if get_string_width(text, self.font_name, self.font_size) <= width:
+            return text
+
+        # Longest prefix which fits with the ellipsis.
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if get_string_width(text[:middle] + '\u2026', self.font_name, self.font_size) <= width:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + '\u2026' if low else ''
+
+    def _get_grid(self, rows):
+        """
+        Returns name of the grid form of the number of rows in the current layout, which is drawn on the first use.
+        :param int rows:
+        :return str:
+        """
+        name = 'grid{}_{}'.format(self._layouts, rows)
+        if name not in self._grids:
+            self.writer.beginForm(name)
+            self.writer.grid(self.xlist, self.ylist[:rows + 1])
+            self.writer.endForm()
+            self._grids.add(name)
+        return name
 
 
 __all__ = [
@@ -262,5 +1383,6 @@ __all__ = [
     'BytesOutputWriter',
     'CSVBytesOutputWriter',
     'XLSXBytesOutputWriter',
+    'XLSXStreamOutputWriter',
     'PDFBytesOutputWriter'
 ]
@@ -16,5 +16,6 @@ setup(
         'Topic :: Software Development',
         'Topic :: System', 'Topic :: Utilities'
     ],
+    python_requires='>=3.9',
     install_requires=install_requires
 )